@@ -0,0 +1,144 @@
+'''
+Plays many seeded games against the simulator across a process pool and reports aggregate stats.
+Win rate and guess counts are reproducible for a given seed list, times naturally are not.
+
+    python batch.py --games 1000 --seed 0 --difficulty expert
+'''
+import argparse
+import json
+import statistics
+from multiprocessing import Pool
+from timeit import default_timer as timer
+from typing import Dict, List
+from game.backend import GameWon
+from game.cache import FrontierCache
+from game.game_new import Game
+from game.simulator import SimulatedBackend
+from main import DIFFICULTIES
+
+
+_cache = None
+
+
+def _initworker(cache_size: int):
+    # every worker shares a frontier cache between the games it plays
+    global _cache
+    _cache = FrontierCache(cache_size) if cache_size else None
+
+
+def playgame(args) -> Dict:
+    seed, difficulty, engine, time_limit, node_limit = args
+    config = DIFFICULTIES[difficulty]
+    backend = SimulatedBackend(config['width'], config['height'], config['bombs'], seed=seed)
+    game = Game(
+        **config,
+        backend=backend,
+        engine=engine,
+        cache=_cache,
+        time_limit=time_limit,
+        node_limit=node_limit,
+        visualize=False
+    )
+    won = False
+    tt = timer()
+    try:
+        game.start()
+        game.attemptsolve()
+    except GameWon:
+        won = True
+    return {
+        'seed': seed,
+        'won': won,
+        'time': timer() - tt,
+        'guesses': game.guesses,
+        'searches_avoided': game.searches_avoided
+    }
+
+
+def summarise(results: List[Dict]) -> Dict:
+    times = sorted(result['time'] for result in results)
+    guesses = [result['guesses'] for result in results]
+    wins = sum(result['won'] for result in results)
+
+    def percentile(values, fraction):
+        return values[min(int(len(values) * fraction), len(values) - 1)]
+
+    return {
+        'games': len(results),
+        'wins': wins,
+        'winrate': wins / len(results) * 100,
+        'time': {
+            'total': sum(times),
+            'mean': statistics.mean(times),
+            'median': percentile(times, 0.5),
+            'p90': percentile(times, 0.9),
+            'max': times[-1],
+        },
+        'guesses': {
+            'total': sum(guesses),
+            'mean': statistics.mean(guesses),
+            'max': max(guesses),
+            'won_without_guessing': sum(1 for r in results if r['won'] and r['guesses'] == 0),
+        },
+        'searches_avoided': sum(result['searches_avoided'] for result in results),
+    }
+
+
+def runbatch(
+    seeds: List[int],
+    difficulty: str='expert',
+    engine: str='csp',
+    processes: int=None,
+    cache_size: int=4096,
+    output: str=None,
+    time_limit: float=None,
+    node_limit: int=None
+) -> Dict:
+    '''
+    Plays one game per seed and returns the aggregate stats. Per-game results are streamed to the
+    output file as JSON lines if one is given.
+    '''
+    results = []
+    out = open(output, 'w') if output else None
+    try:
+        with Pool(processes, initializer=_initworker, initargs=(cache_size,)) as pool:
+            jobs = ((seed, difficulty, engine, time_limit, node_limit) for seed in seeds)
+            for result in pool.imap_unordered(playgame, jobs, chunksize=8):
+                results.append(result)
+                if out:
+                    out.write(json.dumps(result) + '\n')
+                if len(results) % 100 == 0:
+                    print('Played', len(results), 'of', len(seeds), flush=True)
+    finally:
+        if out:
+            out.close()
+    results.sort(key=lambda result: result['seed'])
+    return summarise(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--difficulty', choices=DIFFICULTIES, default='expert')
+    parser.add_argument('--engine', choices=('dlx', 'bits', 'csp'), default='csp')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--cache-size', type=int, default=4096, help='0 disables the cache')
+    parser.add_argument('--output', help='file to write per-game results to as JSON lines')
+    parser.add_argument('--time-limit', type=float, help='seconds to count a frontier before sampling it')
+    parser.add_argument('--node-limit', type=int, help='search nodes to count a frontier before sampling it')
+    args = parser.parse_args()
+
+    tt = timer()
+    summary = runbatch(
+        list(range(args.seed, args.seed + args.games)),
+        args.difficulty,
+        args.engine,
+        args.processes,
+        args.cache_size,
+        args.output,
+        args.time_limit,
+        args.node_limit
+    )
+    print(json.dumps(summary, indent=2))
+    print('Wall time:', timer() - tt)
@@ -0,0 +1,55 @@
+'''
+Compares the dancing links and bitset exact cover engines on frontiers recorded from simulated
+expert games.
+
+    python -m benchmarks.exactcover [n_games] [seed]
+'''
+import sys
+from timeit import default_timer as timer
+from typing import List, Tuple
+from benchmarks.suite import MAX_COVER_ROWS, recordproblems
+from game import bitcover, exactcover, solver
+
+
+def recordmatrices(n_games: int, seed: int) -> List[Tuple[List[Tuple[int]], int, int, int]]:
+    '''
+    Plays simulated expert games and returns the exact cover matrix of every frontier they had to
+    count, leaving out those too large to go through every solution of.
+    '''
+    matrices = []
+    for problem in recordproblems(n_games, seed):
+        mat, _, n_rows, n_cols, n_secondary = solver.creatematrix(problem)
+        if n_rows <= MAX_COVER_ROWS:
+            matrices.append((mat, n_rows, n_cols, n_secondary))
+    return matrices
+
+
+def timeengine(engine, matrices) -> Tuple[float, List[List[List[int]]]]:
+    results = []
+    tt = timer()
+    for mat, n_rows, n_cols, n_secondary in matrices:
+        ret = []
+        engine.exactcover(engine.createnodematrix(mat, n_rows, n_cols, n_secondary), all_solutions=ret)
+        results.append(ret)
+    return timer() - tt, results
+
+
+def main(n_games: int=20, seed: int=0):
+    matrices = recordmatrices(n_games, seed)
+    print('Frontiers:', len(matrices), 'Largest:', max((m[1] for m in matrices), default=0), 'rows')
+
+    dlx_tt, dlx_results = timeengine(exactcover, matrices)
+    bits_tt, bits_results = timeengine(bitcover, matrices)
+
+    for dlx_ret, bits_ret in zip(dlx_results, bits_results):
+        dlx_solutions = set(frozenset(node.row for node in solution) for solution in dlx_ret)
+        bits_solutions = set(frozenset(solution) for solution in bits_ret)
+        assert dlx_solutions == bits_solutions, 'Engines disagree!'
+
+    print('dlx:  %.3fs' % dlx_tt)
+    print('bits: %.3fs' % bits_tt)
+    print('Speedup: %.1fx' % (dlx_tt / bits_tt))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,352 @@
+'''
+Benchmarks the solver on a corpus of recorded frontiers and board states and compares the results
+with a stored baseline.
+
+    python -m benchmarks.suite                     # run and compare with the baseline
+    python -m benchmarks.suite --save-baseline     # run and store the results as the baseline
+    python -m benchmarks.suite --record 20 0       # re-record the frontiers from 20 games, seed 0
+    python -m benchmarks.suite --record-states 8 0 # re-record the board states from 8 games, seed 0
+
+Every operation is timed on its own and reported in calls per second along with the peak memory it
+allocates. A digest of each operation's output is kept too, so a change in results is reported as
+well as a change in speed. Board states are base64 game states as loaded by the simulator, the
+first of which is the GAME_STATE from main.py and the rest of which are taken part way through
+simulated games.
+'''
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tracemalloc
+from timeit import default_timer as timer
+from typing import Any, Callable, Dict, List, Tuple
+from game import bitcover, exactcover, solver
+from game.backend import GameWon
+from game.game_new import Game
+from game.simulator import SimulatedBackend
+from game.solver import FrontierProblem
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(HERE, 'corpus.json')
+BASELINE = os.path.join(HERE, 'baseline.json')
+
+EXPERT = {'difficulty': '', 'width': 30, 'height': 16, 'bombs': 99}
+
+# recorded frontiers need at least this many blanks to be worth timing
+MIN_VARS = 6
+# exact cover goes through every ordering of the bombs, bigger matrices take minutes
+MAX_COVER_ROWS = 64
+# quicker benchmarks are run several times over for each timing
+MIN_SECONDS = 0.2
+
+
+Benchmark = Tuple[List[Callable[[], Any]], Callable[[Any], Any]]  # calls, summary of a result
+
+
+def loadcorpus(path: str=CORPUS) -> Tuple[List[Dict], List[FrontierProblem]]:
+    with open(path) as f:
+        corpus = json.load(f)
+    problems = [
+        FrontierProblem(problem['n_vars'], tuple(map(tuple, problem['constraints'])))
+        for problem in corpus['frontiers']
+    ]
+    return corpus['states'], problems
+
+
+def recordproblems(n_games: int, seed: int) -> List[FrontierProblem]:
+    '''
+    Plays simulated expert games and returns the distinct frontiers which had to be counted.
+    '''
+    problems = {}
+    countmines = solver.countmines
+
+    def recordingcountmines(problem, *args):
+        if problem.n_vars >= MIN_VARS:
+            problems.setdefault(problem, None)
+        return countmines(problem, *args)
+
+    solver.countmines = recordingcountmines
+    try:
+        for game_seed in range(seed, seed + n_games):
+            game = Game(**EXPERT, backend=SimulatedBackend(30, 16, 99, seed=game_seed))
+            try:
+                game.start()
+                game.attemptsolve()
+            except GameWon:
+                pass
+    finally:
+        solver.countmines = countmines
+    return list(problems)
+
+
+class _RecordingGame(Game):
+    # keeps the board as it was before every guess
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.states = []
+
+    def guess(self, blanks):
+        self.states.append(self._backend.exportstate())
+        return super().guess(blanks)
+
+
+def _coverrows(state: str) -> List[int]:
+    game = loadstate({**EXPERT, 'state': state})
+    return [solver.creatematrix(game.createproblem(frontier)[1])[2] for frontier in game.getfrontiers()]
+
+
+def recordstates(n_games: int, seed: int) -> List[Dict]:
+    '''
+    Plays simulated expert games and returns a board state from each, the last one before a guess
+    whose frontiers are all small enough to go through exact cover.
+    '''
+    states = []
+    for game_seed in range(seed, seed + n_games):
+        game = _RecordingGame(**EXPERT, backend=SimulatedBackend(30, 16, 99, seed=game_seed))
+        try:
+            game.start()
+            game.attemptsolve()
+        except GameWon:
+            pass
+        for state in reversed(game.states):
+            rows = _coverrows(state)
+            if rows and max(rows) <= MAX_COVER_ROWS:
+                states.append({'name': f'expert.{game_seed}', 'width': 30, 'height': 16, 'bombs': 99, 'state': state})
+                break
+    return states
+
+
+def loadstate(state: Dict) -> Game:
+    config = {key: state[key] for key in ('width', 'height', 'bombs')}
+    backend = SimulatedBackend(**config, seed=0)
+    return Game('', **config, state=state['state'], backend=backend, snapshot=True)
+
+
+def _counts(counts) -> Tuple:
+    return sorted(counts.counts.items()), sorted((n, tuple(t)) for n, t in counts.tallies.items())
+
+
+def _playgame(state: Dict) -> Tuple[bool, int]:
+    game = loadstate(state)
+    try:
+        game.attemptsolve()
+    except GameWon:
+        return True, game.guesses
+    return False, game.guesses
+
+
+def benchmarks(states: List[Dict], problems: List[FrontierProblem]) -> Dict[str, Benchmark]:
+    '''
+    Returns the calls making up every benchmark. Everything a call needs is prepared beforehand so
+    that only the operation itself is measured.
+    '''
+    ret: Dict[str, Benchmark] = {}
+
+    # the Game methods work on the squares of a loaded board
+    games = [loadstate(state) for state in states]
+    frontiers = [(game, frontier) for game in games for frontier in game.getfrontiers()]
+    matrices = [solver.creatematrix(game.createproblem(frontier)[1]) for game, frontier in frontiers]
+    ret['board.creatematrix'] = (
+        [lambda g=game, f=frontier: solver.creatematrix(g.createproblem(f)[1]) for game, frontier in frontiers],
+        lambda m: (m[2], m[3], m[4])
+    )
+    ret['board.createnodematrix'] = (
+        [lambda m=m: exactcover.createnodematrix(m[0], m[2], m[3], m[4]) for m in matrices],
+        lambda node_matrix: None
+    )
+    node_matrices = [exactcover.createnodematrix(m[0], m[2], m[3], m[4]) for m in matrices]
+    ret['board.exactcover'] = (
+        [lambda n=n: _solutions(exactcover.exactcover, n) for n in node_matrices],
+        len
+    )
+    ret['board.getprobabilities'] = (
+        [lambda g=game, f=frontier: g.getprobabilities(f) for game, frontier in frontiers],
+        lambda probs: sorted((sq.x, sq.y, round(p, 9)) for sq, p in probs.items())
+    )
+    ret['board.game'] = ([lambda s=state: _playgame(s) for state in states], lambda result: result)
+
+    # recorded frontiers are solved without any squares
+    problem_matrices = [solver.creatematrix(problem) for problem in problems]
+    ret['frontier.creatematrix'] = (
+        [lambda p=problem: solver.creatematrix(p) for problem in problems],
+        lambda m: (m[2], m[3], m[4])
+    )
+    ret['frontier.bits.createnodematrix'] = (
+        [lambda m=m: bitcover.createnodematrix(m[0], m[2], m[3], m[4]) for m in problem_matrices],
+        lambda matrix: None
+    )
+    small = [m for m in problem_matrices if m[2] <= MAX_COVER_ROWS]
+    ret['frontier.bits.countcover'] = (
+        [lambda b=bitcover.createnodematrix(m[0], m[2], m[3], m[4]): bitcover.countcover(b) for m in small],
+        lambda counts: sorted(counts.counts.items())
+    )
+    ret['frontier.dlx.exactcover'] = (
+        [
+            lambda n=exactcover.createnodematrix(m[0], m[2], m[3], m[4]): _solutions(exactcover.exactcover, n)
+            for m in small
+        ],
+        len
+    )
+    # building the bits engine's matrix through creatematrix's rows, and straight from the problem
+    # as countmines does, on the frontiers too large for exact cover above
+    large = [problem for problem, m in zip(problems, problem_matrices) if m[2] > MAX_COVER_ROWS]
+    ret['frontier.bits.twopass'] = (
+        [lambda p=problem: _twopass(p) for problem in large],
+        lambda result: result
+    )
+    ret['frontier.bits.onepass'] = (
+        [lambda p=problem: solver.createbitmatrix(p) for problem in large],
+        lambda result: result
+    )
+    for engine in ('csp', 'bits'):
+        ret[f'frontier.{engine}.countmines'] = (
+            [lambda p=problem, e=engine: solver.countmines(p, e) for problem in problems],
+            _counts
+        )
+    return ret
+
+
+def _twopass(problem: FrontierProblem) -> Tuple[bitcover.BitMatrix, List[int]]:
+    mat, row_vars, n_rows, n_cols, n_secondary = solver.creatematrix(problem)
+    return bitcover.createnodematrix(mat, n_rows, n_cols, n_secondary), row_vars
+
+
+def _solutions(search, matrix) -> List:
+    ret = []
+    search(matrix, [], ret)
+    return ret
+
+
+def digest(results: List[Any], summarise: Callable[[Any], Any]) -> str:
+    return hashlib.sha1(repr([summarise(result) for result in results]).encode()).hexdigest()
+
+
+def measure(calls: List[Callable[[], Any]], summarise: Callable[[Any], Any], repeat: int) -> Dict:
+    '''
+    Times the calls, keeping the best of the repeats, and then runs them once more under
+    tracemalloc for the peak memory. Quick benchmarks are run several times per repeat, as timeit
+    does, so that the timings are not just noise.
+    '''
+    tt = timer()
+    results = [call() for call in calls]
+    tt = timer() - tt
+    results_digest = digest(results, summarise)
+    del results
+
+    number = 1
+    while tt * number < MIN_SECONDS:
+        number *= 2
+    best = None
+    for _ in range(repeat):
+        tt = timer()
+        for _ in range(number):
+            for call in calls:
+                call()
+        tt = (timer() - tt) / number
+        best = tt if best is None else min(best, tt)
+
+    tracemalloc.start()
+    peak = 0
+    for call in calls:
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        result = call()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+        del result
+    tracemalloc.stop()
+
+    return {
+        'calls': len(calls),
+        'seconds': best,
+        'ops_per_s': len(calls) / best if best else None,
+        'peak_kib': peak / 1024,
+        'digest': results_digest,
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    '''
+    Returns a description of every benchmark which has changed its output or slowed down by more
+    than the tolerance compared with the baseline.
+    '''
+    problems = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['digest'] != base['digest']:
+            problems.append(f'{name}: results differ from the baseline')
+        if base['ops_per_s'] and result['ops_per_s'] < base['ops_per_s'] * (1 - tolerance):
+            problems.append(
+                f"{name}: {result['ops_per_s']:.1f} ops/s, baseline {base['ops_per_s']:.1f} ops/s"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--record', nargs=2, type=int, metavar=('N_GAMES', 'SEED'), help='re-record the frontiers')
+    parser.add_argument(
+        '--record-states', nargs=2, type=int, metavar=('N_GAMES', 'SEED'), help='re-record the board states'
+    )
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--tolerance', type=float, default=0.3, help='allowed drop in ops/s')
+    parser.add_argument('--only', help='run the benchmarks whose name contains this')
+    args = parser.parse_args()
+
+    states, problems = loadcorpus()
+    if args.record or args.record_states:
+        if args.record:
+            problems = recordproblems(*args.record)
+            print('Recorded', len(problems), 'frontiers')
+        if args.record_states:
+            # the GAME_STATE from main.py stays first
+            states = states[:1] + recordstates(*args.record_states)
+            print('Recorded', len(states) - 1, 'board states')
+        with open(CORPUS, 'w') as f:
+            json.dump({
+                'states': states,
+                'frontiers': [
+                    {'n_vars': problem.n_vars, 'constraints': problem.constraints}
+                    for problem in problems
+                ],
+            }, f, indent=1)
+
+    results = {}
+    for name, (calls, summarise) in benchmarks(states, problems).items():
+        if args.only and args.only not in name:
+            continue
+        results[name] = measure(calls, summarise, args.repeat)
+        result = results[name]
+        print('%-32s %5d calls %9.4fs %10.1f ops/s %9.1f KiB peak' % (
+            name, result['calls'], result['seconds'], result['ops_per_s'] or 0, result['peak_kib']
+        ))
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE):
+            with open(BASELINE) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(BASELINE, 'w') as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print('Saved baseline')
+        return
+
+    if not os.path.exists(BASELINE):
+        print('No baseline to compare with, run with --save-baseline')
+        return
+    with open(BASELINE) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for regression in regressions:
+        print('REGRESSION', regression)
+    if regressions:
+        sys.exit(1)
+    print('No regressions')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Tuple
+
+
+class GameWon(Exception):
+    '''
+    Raised by a backend once every safe square on the board has been opened.
+    '''
+
+
+class BoardView(ABC):
+    '''
+    The part of a Minesweeper board Grid and Square read, which is all a board that can only be
+    looked at provides. Elements are opaque handles returned by squares() in row-major order.
+    '''
+    @abstractmethod
+    def squares(self) -> List[Any]:
+        '''
+        Returns a handle for every square on the board, row by row.
+        '''
+
+    @abstractmethod
+    def getclass(self, element) -> str:
+        '''
+        Returns the class attribute of the given square, e.g. 'square open3'.
+        '''
+
+    @abstractmethod
+    def snapshot(self) -> List[str]:
+        '''
+        Returns the class attribute of every square in the same order as squares(), in one call.
+        '''
+
+
+class Backend(BoardView):
+    '''
+    The surface Grid and Square use to play on a Minesweeper board.
+    '''
+    @abstractmethod
+    def click(self, element) -> None:
+        '''
+        Left clicks the given square.
+        '''
+
+    @abstractmethod
+    def flag(self, element) -> None:
+        '''
+        Toggles the flag on the given blank square.
+        '''
+
+    @abstractmethod
+    def chord(self, element) -> None:
+        '''
+        Opens the blank squares around the given clue if its adjacent flags satisfy it.
+        '''
+
+    def perform(self, moves: List[Tuple[str, Any]]) -> None:
+        '''
+        Makes the given ('click' | 'flag' | 'chord', element) moves in order. Backends which can
+        send several moves at once override this.
+        '''
+        for move, element in moves:
+            getattr(self, move)(element)
+
+    @abstractmethod
+    def execute_script(self, script: str) -> Any:
+        '''
+        Runs the given JavaScript on the game page.
+        '''
+
+    @abstractmethod
+    def loadstate(self, state: str) -> None:
+        '''
+        Loads a game state exported from minesweeperonline.com.
+        '''
+
+    @abstractmethod
+    def restart(self) -> None:
+        '''
+        Starts a new game on the same board size.
+        '''
+
+    @abstractmethod
+    def savescreenshot(self) -> None:
+        '''
+        Saves a picture of the board for later inspection.
+        '''
+
+    @abstractmethod
+    def close(self) -> None:
+        '''
+        Releases any resources held by the backend.
+        '''
+
+    def alive(self) -> bool:
+        '''
+        Returns whether the backend can still be played on.
+        '''
+        return True
+
+    def exportstate(self) -> Optional[str]:
+        '''
+        Returns the board as a game state, see serialize.py, if the backend knows where the mines
+        are.
+        '''
+        return None
+
+
+class QueuedBackend(Backend):
+    '''
+    Holds back the clicks, flags and chords made through it and sends them to the wrapped backend
+    as one batch with perform. The moves are flushed before anything is read from the board, so
+    reads always see every move made before them.
+    '''
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+        self._moves: List[Tuple[str, Any]] = []
+
+    def flush(self) -> None:
+        if self._moves:
+            # taken off the queue first, a move may end the game by raising GameWon
+            moves, self._moves = self._moves, []
+            self.backend.perform(moves)
+
+    def squares(self) -> List[Any]:
+        self.flush()
+        return self.backend.squares()
+
+    def getclass(self, element) -> str:
+        self.flush()
+        return self.backend.getclass(element)
+
+    def snapshot(self) -> List[str]:
+        self.flush()
+        return self.backend.snapshot()
+
+    def click(self, element) -> None:
+        self._moves.append(('click', element))
+
+    def flag(self, element) -> None:
+        self._moves.append(('flag', element))
+
+    def chord(self, element) -> None:
+        self._moves.append(('chord', element))
+
+    def perform(self, moves: List[Tuple[str, Any]]) -> None:
+        self._moves.extend(moves)
+
+    def execute_script(self, script: str) -> Any:
+        self.flush()
+        return self.backend.execute_script(script)
+
+    def loadstate(self, state: str) -> None:
+        self._moves.clear()
+        self.backend.loadstate(state)
+
+    def restart(self) -> None:
+        # the moves of the last game have no board left to be made on
+        self._moves.clear()
+        self.backend.restart()
+
+    def savescreenshot(self) -> None:
+        self.flush()
+        self.backend.savescreenshot()
+
+    def close(self) -> None:
+        self._moves.clear()
+        self.backend.close()
+
+    def alive(self) -> bool:
+        return self.backend.alive()
+
+    def exportstate(self) -> Optional[str]:
+        self.flush()
+        return self.backend.exportstate()
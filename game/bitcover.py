@@ -0,0 +1,163 @@
+'''
+Algorithm X on bitsets. Drop-in alternative to the dancing links in exactcover.py: the matrix is
+stored as one integer bitset of columns per row and one bitset of rows per column, so the search
+only ever creates ints. Solutions are lists of row indices rather than nodes. Columns past n_cols
+are secondary: they may be covered at most once rather than exactly once.
+'''
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from game.csp import Budget
+
+
+class BitMatrix(NamedTuple):
+    rows: List[int]  # bitset of the columns each row covers
+    cols: List[int]  # bitset of the rows covering each column
+    conflicts: List[int]  # bitset of the rows sharing a column with each row, itself included
+    n_cols: int  # number of primary columns
+
+
+class CoverCounts(NamedTuple):
+    counts: Dict[int, int]  # number of solutions by number of rows
+    tallies: Dict[int, List[int]]  # how many of those solutions include each row
+
+
+def createnodematrix(
+    comp_mat: List[List[int]],
+    n_rows: int,
+    n_cols: int,
+    n_secondary: int=0
+) -> BitMatrix:
+    '''
+    Creates a bitset representation of the given compressed matrix. The n_secondary columns after
+    the first n_cols may be covered at most once instead of exactly once.
+    '''
+    rows = [0] * n_rows
+    cols = [0] * (n_cols + n_secondary)
+    for row_num in range(n_rows):
+        for col in comp_mat[row_num]:
+            rows[row_num] |= 1 << col
+            cols[col] |= 1 << row_num
+
+    conflicts = [0] * n_rows
+    for row_num in range(n_rows):
+        for col in comp_mat[row_num]:
+            conflicts[row_num] |= cols[col]
+    return BitMatrix(rows, cols, conflicts, n_cols)
+
+
+def exactcover(
+    matrix: BitMatrix,
+    partial_solution: Optional[List[int]]=None,
+    all_solutions: Optional[List[List[int]]]=None
+) -> None:
+    '''
+    Finds every subset of rows of the matrix which solves the exact cover problem and appends them
+    to all_solutions.
+    '''
+    if all_solutions is None:
+        all_solutions = []
+    all_solutions.extend(itercover(matrix, partial_solution))
+
+
+def itercover(matrix: BitMatrix, partial_solution: Optional[List[int]]=None) -> Iterator[List[int]]:
+    '''
+    Yields the exact cover solutions one at a time so that only the current branch of the search is
+    held in memory.
+    '''
+    if partial_solution is None:
+        partial_solution = []
+    active_rows = (1 << len(matrix.rows)) - 1
+    yield from _search(matrix, active_rows, (1 << matrix.n_cols) - 1, partial_solution)
+
+
+def countcover(matrix: BitMatrix, budget: Optional[Budget]=None) -> CoverCounts:
+    '''
+    Counts the exact cover solutions without storing them, grouped by the number of rows in the
+    solution. Alongside each count is the number of those solutions every row takes part in.
+    '''
+    counts = CoverCounts({}, {})
+    _count(matrix, (1 << len(matrix.rows)) - 1, (1 << matrix.n_cols) - 1, [], counts, budget)
+    return counts
+
+
+def _selectrows(matrix: BitMatrix, active_rows: int, uncovered: int) -> int:
+    '''
+    Returns the active rows of the uncovered column with the fewest of them.
+    '''
+    selected_rows = 0
+    selected_count = None
+    remaining = uncovered
+    while remaining:
+        low = remaining & -remaining
+        remaining ^= low
+        col_rows = matrix.cols[low.bit_length() - 1] & active_rows
+        count = col_rows.bit_count()
+        if selected_count is None or count < selected_count:
+            selected_rows = col_rows
+            selected_count = count
+            if count == 0:  # terminate early if empty column is found
+                break
+    return selected_rows
+
+
+def _search(
+    matrix: BitMatrix,
+    active_rows: int,
+    uncovered: int,
+    partial_solution: List[int]
+) -> Iterator[List[int]]:
+    if not uncovered:  # empty matrix, partial solution is a complete solution
+        yield partial_solution[:]
+        return
+
+    # iterate through the rows which are '1's, an empty column means an exact cover is impossible
+    selected_rows = _selectrows(matrix, active_rows, uncovered)
+    while selected_rows:
+        low = selected_rows & -selected_rows
+        selected_rows ^= low
+        row_num = low.bit_length() - 1
+        partial_solution.append(row_num)
+        yield from _search(
+            matrix,
+            active_rows & ~matrix.conflicts[row_num],
+            uncovered & ~matrix.rows[row_num],
+            partial_solution
+        )
+        partial_solution.pop()
+
+
+def _count(
+    matrix: BitMatrix,
+    active_rows: int,
+    uncovered: int,
+    partial_solution: List[int],
+    counts: CoverCounts,
+    budget: Optional[Budget]=None
+) -> None:
+    if budget is not None:
+        budget.spend()
+    if not uncovered:
+        n = len(partial_solution)
+        if n not in counts.counts:
+            counts.counts[n] = 0
+            counts.tallies[n] = [0] * len(matrix.rows)
+        counts.counts[n] += 1
+        tallies = counts.tallies[n]
+        for row_num in partial_solution:
+            tallies[row_num] += 1
+        return
+
+    selected_rows = _selectrows(matrix, active_rows, uncovered)
+    while selected_rows:
+        low = selected_rows & -selected_rows
+        selected_rows ^= low
+        row_num = low.bit_length() - 1
+        partial_solution.append(row_num)
+        _count(
+            matrix,
+            active_rows & ~matrix.conflicts[row_num],
+            uncovered & ~matrix.rows[row_num],
+            partial_solution,
+            counts,
+            budget
+        )
+        partial_solution.pop()
@@ -0,0 +1,164 @@
+'''
+Compact state of the squares of a grid. Squares are numbered row by row and their state is kept in
+flat arrays, with the blanks, flags and open squares also kept as bitsets (bit i being square i) so
+that the board can be queried with a few integer operations instead of a scan over every square.
+'''
+from array import array
+from functools import lru_cache
+from typing import Iterator, List, Tuple
+
+
+# what a square shows
+BLANK = 0
+FLAG = 1
+BOMBDEATH = 2
+BOMBREVEALED = 3
+OPEN = 4
+
+
+def indices(mask: int) -> Iterator[int]:
+    '''
+    Yields the squares of a bitset in ascending order.
+    '''
+    while mask:
+        low = mask & -mask
+        mask ^= low
+        yield low.bit_length() - 1
+
+
+@lru_cache(maxsize=None)
+def neighbourtables(width: int, height: int) -> Tuple[Tuple[Tuple[int]], Tuple[int]]:
+    '''
+    Returns the neighbours of every square of a board and the same as bitsets. Boards of the same
+    size share these.
+    '''
+    neighbours = []
+    for index in range(width * height):
+        x, y = index % width, index // width
+        neighbours.append(tuple(
+            dsty * width + dstx
+            for dsty in range(max(y - 1, 0), min(y + 2, height))
+            for dstx in range(max(x - 1, 0), min(x + 2, width))
+            if dstx != x or dsty != y
+        ))
+    return tuple(neighbours), tuple(sum(1 << j for j in adj) for adj in neighbours)
+
+
+@lru_cache(maxsize=None)
+def shifttables(width: int, height: int) -> Tuple[Tuple[int, int]]:
+    '''
+    Returns an (offset, valid squares) pair for each of the 8 directions. Shifting a bitset right by
+    the offset (left if negative) and keeping the valid squares moves every square's neighbour in
+    that direction onto the square, i.e. one term of a 3x3 convolution over the board.
+    '''
+    tables = []
+    for dy in range(-1, 2):
+        for dx in range(-1, 2):
+            if dx or dy:
+                valid = sum(
+                    1 << (y * width + x)
+                    for y in range(height) for x in range(width)
+                    if 0 <= x + dx < width and 0 <= y + dy < height
+                )
+                tables.append((dy * width + dx, valid))
+    return tuple(tables)
+
+
+class BoardState:
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        n_squares = width * height
+        self.kinds = array('b', [BLANK]) * n_squares
+        self.clues = array('b', [-1]) * n_squares  # remaining clue value, -1 if not a clue
+        self.blank = (1 << n_squares) - 1
+        self.flag = 0
+        self.open = 0
+        self.revealed = 0  # clues whose blanks have been chorded
+        self.clue_planes = [0] * 4  # bit k of every square's remaining clue value
+        self.neighbours, self.neighbour_masks = neighbourtables(width, height)
+        self._shifts = shifttables(width, height)
+
+    def setkind(self, index: int, kind: int) -> None:
+        bit = 1 << index
+        self.blank &= ~bit
+        self.flag &= ~bit
+        self.open &= ~bit
+        if kind == BLANK:
+            self.blank |= bit
+        elif kind == FLAG:
+            self.flag |= bit
+        elif kind == OPEN:
+            self.open |= bit
+        self.kinds[index] = kind
+
+    def countblanks(self, index: int) -> int:
+        return (self.blank & self.neighbour_masks[index]).bit_count()
+
+    def countflags(self, index: int) -> int:
+        return (self.flag & self.neighbour_masks[index]).bit_count()
+
+    def unsatisfied(self) -> int:
+        '''
+        Returns the clues with bombs remaining.
+        '''
+        remaining = 0
+        for clue in self.clue_planes:
+            remaining |= clue
+        return remaining & self.open
+
+    def setclue(self, index: int, value: int) -> None:
+        bit = 1 << index
+        for k in range(len(self.clue_planes)):
+            if value >> k & 1:
+                self.clue_planes[k] |= bit
+            else:
+                self.clue_planes[k] &= ~bit
+        self.clues[index] = value
+
+    def _shifted(self, mask: int) -> Iterator[int]:
+        # the neighbours of every square in each direction
+        for offset, valid in self._shifts:
+            yield (mask >> offset if offset >= 0 else mask << -offset) & valid
+
+    def dilate(self, mask: int) -> int:
+        '''
+        Returns the squares adjacent to any square of the bitset.
+        '''
+        ret = 0
+        for shifted in self._shifted(mask):
+            ret |= shifted
+        return ret
+
+    def countneighbours(self, mask: int) -> List[int]:
+        '''
+        Counts the neighbours of every square which are in the bitset. The counts are returned bit
+        sliced, bit k of a square's count being in the k-th bitset.
+        '''
+        planes = [0] * 4
+        for bits in self._shifted(mask):
+            for k in range(len(planes)):
+                carry = planes[k] & bits
+                planes[k] ^= bits
+                bits = carry
+                if not bits:
+                    break
+        return planes
+
+    def trivial(self) -> Tuple[int, int]:
+        '''
+        Finds the clues of the whole board which need no search: those whose remaining value
+        matches their blanks, every one of which is a bomb, and those with no bombs remaining but
+        blanks left to reveal. Returns the blanks to flag and the clues to reveal as bitsets.
+        '''
+        counts = self.countneighbours(self.blank)
+        has_blanks = 0
+        differs = 0
+        for count, clue in zip(counts, self.clue_planes):
+            has_blanks |= count
+            differs |= count ^ clue
+        clues = self.open & has_blanks
+        remaining = self.unsatisfied()
+        to_flag = self.dilate(clues & remaining & ~differs) & self.blank
+        to_reveal = clues & ~remaining & ~self.revealed
+        return to_flag, to_reveal
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+from game.csp import MineCounts
+from game.square_new import Square
+
+
+# the 8 rotations and reflections of the board
+TRANSFORMS = (
+    lambda x, y: (x, y),
+    lambda x, y: (-x, y),
+    lambda x, y: (x, -y),
+    lambda x, y: (-x, -y),
+    lambda x, y: (y, x),
+    lambda x, y: (-y, x),
+    lambda x, y: (y, -x),
+    lambda x, y: (-y, -x),
+)
+
+
+def signature(clues: List[Square], blanks: List[Square]) -> Tuple[Hashable, List[Square]]:
+    '''
+    Returns an encoding of the frontier which is the same wherever it is on the board and however
+    it is rotated or reflected, along with its blanks in the order the encoding lists them. Clues
+    are encoded by their remaining value and blanks by 0.
+    '''
+    best_key = None
+    best_blanks = None
+    for transform in TRANSFORMS:
+        cells = [(*transform(sq.x, sq.y), sq.clue) for sq in clues]
+        blank_cells = [transform(sq.x, sq.y) for sq in blanks]
+        min_x = min([x for x, _, _ in cells] + [x for x, _ in blank_cells])
+        min_y = min([y for _, y, _ in cells] + [y for _, y in blank_cells])
+        order = sorted(range(len(blanks)), key=lambda i: blank_cells[i])
+        key = (
+            tuple(sorted((x - min_x, y - min_y, clue) for x, y, clue in cells)),
+            tuple((blank_cells[i][0] - min_x, blank_cells[i][1] - min_y) for i in order)
+        )
+        if best_key is None or key < best_key:
+            best_key = key
+            best_blanks = [blanks[i] for i in order]
+    return best_key, best_blanks
+
+
+class FrontierCache:
+    '''
+    Least recently used cache of frontier solutions keyed by signature(). The bomb tallies are
+    stored in the order of the signature's blanks so that any frontier with the same constraints
+    can reuse them. A single cache can be shared by several games.
+    '''
+    def __init__(self, maxsize: int=4096) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, MineCounts]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __repr__(self) -> str:
+        return f'FrontierCache({len(self)}/{self.maxsize}, hits={self.hits}, misses={self.misses})'
+
+    def get(self, key: Hashable) -> Optional[MineCounts]:
+        counts = self._entries.get(key)
+        if counts is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return counts
+
+    def put(self, key: Hashable, counts: MineCounts) -> None:
+        self._entries[key] = counts
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
@@ -0,0 +1,219 @@
+'''
+Constraint solver over frontier blanks. Every blank is a 0/1 variable and every clue a constraint
+on the sum of the blanks around it. Variables and assignments are bitsets, bit i being variable i,
+so each distinct bomb arrangement is enumerated exactly once without building an exact cover
+matrix.
+'''
+from time import perf_counter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+Constraint = Tuple[int, int]  # (bitset of variables, number of bombs among them)
+
+
+class MineCounts(NamedTuple):
+    counts: Dict[int, int]  # number of assignments by number of bombs
+    tallies: Dict[int, List[int]]  # how many of those assignments have a bomb on each variable
+    stderr: float = 0.0  # standard error of the bomb probabilities if the counts are estimated
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class Budget:
+    '''
+    Limits a search to a number of nodes and/or seconds from its creation. Searches call spend at
+    every node, which raises BudgetExceeded once either limit is reached.
+    '''
+    def __init__(self, seconds: Optional[float]=None, nodes: Optional[int]=None) -> None:
+        self.seconds = seconds
+        self.deadline = perf_counter() + seconds if seconds is not None else None
+        self.nodes = nodes
+        self.spent = 0
+
+    def spend(self) -> None:
+        self.spent += 1
+        if self.nodes is not None and self.spent > self.nodes:
+            raise BudgetExceeded(f'{self.nodes} nodes')
+        # checking the clock is comparatively slow, only do it every so often
+        if self.deadline is not None and not self.spent & 0xff and perf_counter() > self.deadline:
+            raise BudgetExceeded(f'{self.spent} nodes in the time limit')
+
+
+def propagate(constraints: List[Constraint], mines: int, safe: int) -> Optional[Tuple[int, int]]:
+    '''
+    Repeatedly assigns the variables forced by a single constraint, i.e. when the remaining bombs
+    of a constraint are 0 or match its unassigned variables. Returns the extended (mines, safe)
+    assignment or None if a constraint can no longer be satisfied.
+    '''
+    changed = True
+    while changed:
+        changed = False
+        for mask, value in constraints:
+            unknown = mask & ~(mines | safe)
+            remaining = value - (mask & mines).bit_count()
+            n_unknown = unknown.bit_count()
+            if remaining < 0 or remaining > n_unknown:
+                return None
+            if unknown and remaining == 0:
+                safe |= unknown
+                changed = True
+            elif unknown and remaining == n_unknown:
+                mines |= unknown
+                changed = True
+    return mines, safe
+
+
+def _selectvar(constraints: List[Constraint], mines: int, safe: int) -> int:
+    '''
+    Returns the lowest unassigned variable of the constraint with the fewest unassigned variables,
+    or 0 if every variable is assigned.
+    '''
+    selected = 0
+    selected_count = None
+    for mask, _ in constraints:
+        unknown = mask & ~(mines | safe)
+        if unknown:
+            count = unknown.bit_count()
+            if selected_count is None or count < selected_count:
+                selected = unknown & -unknown
+                selected_count = count
+    return selected
+
+
+def iterassignments(
+    constraints: List[Constraint],
+    mines: int=0,
+    safe: int=0,
+    budget: Optional[Budget]=None
+) -> Iterator[int]:
+    '''
+    Yields the bitset of bombs of every assignment satisfying the constraints.
+    '''
+    if budget is not None:
+        budget.spend()
+    assignment = propagate(constraints, mines, safe)
+    if assignment is None:
+        return
+    mines, safe = assignment
+    var = _selectvar(constraints, mines, safe)
+    if not var:
+        yield mines
+        return
+    yield from iterassignments(constraints, mines | var, safe, budget)
+    yield from iterassignments(constraints, mines, safe | var, budget)
+
+
+def countassignments(n_vars: int, constraints: List[Constraint], budget: Optional[Budget]=None) -> MineCounts:
+    '''
+    Counts the assignments satisfying the constraints grouped by their number of bombs, along with
+    how many of them place a bomb on each variable.
+    '''
+    counts = MineCounts({}, {})
+    for mines in iterassignments(constraints, budget=budget):
+        n = mines.bit_count()
+        if n not in counts.counts:
+            counts.counts[n] = 0
+            counts.tallies[n] = [0] * n_vars
+        counts.counts[n] += 1
+        tallies = counts.tallies[n]
+        while mines:
+            low = mines & -mines
+            mines ^= low
+            tallies[low.bit_length() - 1] += 1
+    return counts
+
+
+def _residual(constraint: Constraint, mines: int, safe: int) -> Tuple[int, int]:
+    # the unassigned variables of the constraint and the bombs left among them
+    mask, value = constraint
+    return mask & ~(mines | safe), value - (mask & mines).bit_count()
+
+
+def reduce(constraints: List[Constraint], mines: int=0, safe: int=0) -> Optional[Tuple[int, int]]:
+    '''
+    Assigns the variables forced by single constraints and by pairs of overlapping constraints,
+    without any search. For a pair the bombs among the shared variables are bounded by both
+    constraints, which settles patterns such as 1-2-1 where one constraint's variables are a subset
+    of the other's or where they overlap. Constraints are revisited from a worklist whenever one of
+    their variables is assigned until nothing changes. Returns the extended (mines, safe)
+    assignment or None if the constraints cannot be satisfied.
+    '''
+    by_var: Dict[int, List[int]] = {}
+    for c, (mask, _) in enumerate(constraints):
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            by_var.setdefault(low, []).append(c)
+
+    worklist = list(reversed(range(len(constraints))))
+    queued = set(worklist)
+    while worklist:
+        c = worklist.pop()
+        queued.discard(c)
+        a, va = _residual(constraints[c], mines, safe)
+        n_a = a.bit_count()
+        if va < 0 or va > n_a:
+            return None
+        if not a:
+            continue
+
+        new_mines = 0
+        new_safe = 0
+        if va == 0:
+            new_safe = a
+        elif va == n_a:
+            new_mines = a
+        else:
+            partners = set()
+            var_bits = a
+            while var_bits:
+                low = var_bits & -var_bits
+                var_bits ^= low
+                partners.update(by_var[low])
+            partners.discard(c)
+            for d in sorted(partners):
+                b, vb = _residual(constraints[d], mines, safe)
+                shared = a & b
+                only_a = a & ~b
+                only_b = b & ~a
+                n_only_a = only_a.bit_count()
+                n_only_b = only_b.bit_count()
+                # range of the number of bombs among the shared variables
+                lo = max(0, va - n_only_a, vb - n_only_b)
+                hi = min(shared.bit_count(), va, vb)
+                if lo > hi:
+                    return None
+                if va - hi == n_only_a:
+                    new_mines |= only_a
+                elif va - lo == 0:
+                    new_safe |= only_a
+                if vb - hi == n_only_b:
+                    new_mines |= only_b
+                elif vb - lo == 0:
+                    new_safe |= only_b
+                if lo == hi == 0:
+                    new_safe |= shared
+                elif lo == hi == shared.bit_count():
+                    new_mines |= shared
+                if new_mines or new_safe:
+                    break
+
+        if new_mines & new_safe:
+            return None
+        mines |= new_mines
+        safe |= new_safe
+        assigned = new_mines | new_safe
+        if assigned:
+            # revisit every constraint which has lost a variable
+            worklist.append(c)
+            queued.add(c)
+            while assigned:
+                low = assigned & -assigned
+                assigned ^= low
+                for d in by_var[low]:
+                    if d not in queued:
+                        queued.add(d)
+                        worklist.append(d)
+    return mines, safe
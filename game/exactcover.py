@@ -29,6 +29,8 @@
 
 from abc import ABC
 from typing import List, Optional, Tuple
+from game.bitcover import CoverCounts
+from game.csp import Budget
 
 
 class NodeBase(ABC):
@@ -104,23 +106,33 @@ def printnodematrix(node_matrix: HeadNode, n_rows: int, n_cols: int) -> None:
     print(' '.join(map(str, range(n_cols))) + '\n' + '\n'.join([' '.join(map(str, row)) for row in res]))
 
 
-def createnodematrix(comp_mat: List[List[int]], n_rows: int, n_cols: int) -> HeadNode:
+def createnodematrix(
+    comp_mat: List[List[int]],
+    n_rows: int,
+    n_cols: int,
+    n_secondary: int=0
+) -> HeadNode:
     '''
     Creates a node representation of the given compressed matrix. Every node is connected to the 4
-    adjacent nodes. The connections are circular. Returns the head node.
+    adjacent nodes. The connections are circular. Returns the head node. The n_secondary columns
+    after the first n_cols are left out of the header row, so they may be covered at most once
+    instead of exactly once.
     '''
     head = HeadNode('h', 0, 0)
     prev = head
 
     # create column header nodes
-    heads = [ColumnHeaderNode(0, 0, 0) for _ in range(n_cols)]
+    heads = [ColumnHeaderNode(0, 0, 0) for _ in range(n_cols + n_secondary)]
     tails = [col_head for col_head in heads]
-    for col_node in heads:
+    for col_node in heads[:n_cols]:
         col_node.left = prev
         prev.right = col_node
         prev = col_node
     head.left = prev
     prev.right = head
+    for col_node in heads[n_cols:]:
+        col_node.left = col_node
+        col_node.right = col_node
 
     # create matrix of nodes row by row
     for row_num in range(n_rows):
@@ -148,18 +160,29 @@ def createnodematrix(comp_mat: List[List[int]], n_rows: int, n_cols: int) -> Hea
             row_tail.right = row_head
 
     # wrap the tails of each column back to their heads
-    for col in range(n_cols):
+    for col in range(n_cols + n_secondary):
         tails[col].down = heads[col]
         heads[col].up = tails[col]
 
     return head
 
 
-def exactcover(node_matrix: HeadNode, partial_solution: List[Node]=[], all_solutions: List[Node]=[]) -> List[List[Node]]:
+def exactcover(
+    node_matrix: HeadNode,
+    partial_solution: Optional[List[Node]]=None,
+    all_solutions: Optional[List[List[Node]]]=None,
+    budget: Optional[Budget]=None
+) -> List[List[Node]]:
     '''
     Finds a subset of rows from the node matrix which solves the exact cover problem or None if no
-    solution is found.
+    solution is found. The matrix and partial solution are restored even if the budget runs out.
     '''
+    if partial_solution is None:
+        partial_solution = []
+    if all_solutions is None:
+        all_solutions = []
+    if budget is not None:
+        budget.spend()
     selected_col, selected_count = selectcol(node_matrix)
     if selected_col == node_matrix:  # empty matrix, partial solution is a complete solution
         all_solutions.append(partial_solution[:])
@@ -176,36 +199,18 @@ def exactcover(node_matrix: HeadNode, partial_solution: List[Node]=[], all_solut
 
         # include current row in partial solution
         partial_solution.append(current_row)
-
-        # iterate each column in current row
-        deleted_nodes = []
-        deleting_col = current_row
-        while True:
-            # iterate each row in that column
-            deleting_row = deleting_col
-            while True:
-                if type(deleting_row) == Node: # skip header rows
-                    deleted_nodes += removerow(deleting_row)
-
-                if deleting_row.down == deleting_row:
-                    break
-                deleting_row = deleting_row.down
-
-            deleted_nodes += removecolumn(deleting_col)
-
-            if deleting_col.right == deleting_col:
-                break
-            deleting_col = deleting_col.right
+        deleted_nodes = coverrow(current_row)
 
         # recurse with the reduced dancing links
-        exactcover(node_matrix, partial_solution, all_solutions)
-        # if ret is not None:
-        #     return ret
-
-        # restore state before moving on
-        partial_solution.pop()
-        for node in deleted_nodes:
-            restorenode(node)
+        try:
+            exactcover(node_matrix, partial_solution, all_solutions, budget)
+            # if ret is not None:
+            #     return ret
+        finally:
+            # restore state before moving on
+            partial_solution.pop()
+            for node in deleted_nodes:
+                restorenode(node)
 
         current_row = current_row.down
     
@@ -213,6 +218,82 @@ def exactcover(node_matrix: HeadNode, partial_solution: List[Node]=[], all_solut
     return
 
 
+def countcover(node_matrix: HeadNode, n_rows: int, budget: Optional[Budget]=None) -> CoverCounts:
+    '''
+    Counts the exact cover solutions of the node matrix without storing them, grouped by the number
+    of rows in the solution, along with the number of those solutions every row takes part in. The
+    matrix is restored even if the budget runs out.
+    '''
+    counts = CoverCounts({}, {})
+    _count(node_matrix, n_rows, [], counts, budget)
+    return counts
+
+
+def _count(
+    node_matrix: HeadNode,
+    n_rows: int,
+    partial_solution: List[int],
+    counts: CoverCounts,
+    budget: Optional[Budget]
+) -> None:
+    if budget is not None:
+        budget.spend()
+    selected_col, selected_count = selectcol(node_matrix)
+    if selected_col == node_matrix:  # empty matrix, partial solution is a complete solution
+        n = len(partial_solution)
+        if n not in counts.counts:
+            counts.counts[n] = 0
+            counts.tallies[n] = [0] * n_rows
+        counts.counts[n] += 1
+        tallies = counts.tallies[n]
+        for row_num in partial_solution:
+            tallies[row_num] += 1
+        return
+
+    # if the column has no '1's, an exact cover is impossible
+    if selected_count == 0:
+        return
+
+    current_row = selected_col.down
+    while current_row != selected_col:
+        partial_solution.append(current_row.row)
+        deleted_nodes = coverrow(current_row)
+        try:
+            _count(node_matrix, n_rows, partial_solution, counts, budget)
+        finally:
+            partial_solution.pop()
+            for node in deleted_nodes:
+                restorenode(node)
+        current_row = current_row.down
+
+
+def coverrow(current_row: Node) -> List[Node]:
+    '''
+    Removes the columns of a row and every row sharing one of them. Returns the removed nodes in
+    order of their removal, for restorenode.
+    '''
+    # iterate each column in current row
+    deleted_nodes = []
+    deleting_col = current_row
+    while True:
+        # iterate each row in that column
+        deleting_row = deleting_col
+        while True:
+            if type(deleting_row) == Node: # skip header rows
+                deleted_nodes += removerow(deleting_row)
+
+            if deleting_row.down == deleting_row:
+                break
+            deleting_row = deleting_row.down
+
+        deleted_nodes += removecolumn(deleting_col)
+
+        if deleting_col.right == deleting_col:
+            break
+        deleting_col = deleting_col.right
+    return deleted_nodes
+
+
 def selectcol(node_matrix: HeadNode) -> Tuple[ColumnHeaderNode, int]:
     '''
     Selects the column with the fewest number of nodes.
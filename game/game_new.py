@@ -1,157 +1,333 @@
 import itertools
-from typing import DefaultDict, List, Optional, Set, Tuple
-from selenium import webdriver
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.common.keys import Keys
-from game.exactcover import createnodematrix, exactcover
+from concurrent.futures import Executor
+from time import perf_counter
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from game import csp, probability, solver
+from game.backend import Backend, GameWon, QueuedBackend
+from game import serialize
+from game.board import indices
+from game.cache import FrontierCache, signature
 from game.grid_new import Grid
+from game.instrument import Instrument, InstrumentedBackend, timed
+from game.patterns import PatternTable
+from game.pipeline import PipelinedBackend
+from game.replay import MoveLog
+from game.solver import FrontierProblem
 from game.square_new import Square
+from game.visualizer import Visualizer
 
 
 class Game:
-    WEBDRIVER_PATH = 'E:/New folder/xtras/Minesweeper/webdriver/chromedriver.exe'
-    GAMEURL = 'http://minesweeperonline.com/#'
-
     def __init__(
         self,
         difficulty: str,
         width: int,
         height: int,
         bombs: int,
-        state: str=None
+        state: str=None,
+        backend: Backend=None,
+        snapshot: bool=False,
+        engine: str='csp',
+        cache: Optional[FrontierCache]=None,
+        executor: Optional[Executor]=None,
+        time_limit: Optional[float]=None,
+        node_limit: Optional[int]=None,
+        instrument: Optional[Instrument]=None,
+        visualize: bool=True,
+        pipeline: bool=False,
+        log: Optional[MoveLog]=None,
+        patterns: Optional[PatternTable]=None
     ):
+        '''
+        The engine selects the solver used by getprobabilities: 'dlx' for the dancing links in
+        exactcover.py, 'bits' for the bitset search in bitcover.py or 'csp' for the constraint
+        solver in csp.py which works on the frontier directly instead of an exact cover matrix.
+        Solutions are looked up in and added to the cache when one is given.
+
+        With an executor, e.g. a ProcessPoolExecutor, all frontiers are solved on it at once before
+        any of them is needed and the solutions are kept in the cache, a private one if none is
+        given.
+
+        Counting a frontier which takes more than time_limit seconds or node_limit search nodes is
+        abandoned for an estimate by sampling, which gets the same limits again. Estimates are only
+        kept until the next move and only used to guess.
+
+        An instrument records the time spent in every phase of the game, backend calls included,
+        along with the search effort of every frontier. See report.
+
+        With visualize the squares being worked on are highlighted on the page. Turning it off saves
+        the script calls when nobody is watching.
+
+        With pipeline the backend is called from a thread of its own, see pipeline.py. Moves are
+        then made while the game carries on, and while the board is read back the frontiers left
+        over from the last step are counted into the cache, a private one if none is given.
+
+        Every move is written to the log if one is given, see replay.py. The driver calls endgame
+        once a game is over to record where the mines were.
+
+        With a pattern table small frontiers are looked up before they are searched. The table
+        is a cache of the layouts seen in simulated games, see patterns.py.
+        '''
         self.width = width
         self.height = height
         self.bombs = bombs
         self.remaining_bombs = bombs
         self.game_over = False
-        self._webdriver = webdriver.Chrome(executable_path=Game.WEBDRIVER_PATH + difficulty)
-        self._webdriver.set_window_size(800, 600)
-        self._webdriver.get(self.GAMEURL + difficulty)
+        self.guesses = 0
+        self.searches_avoided = 0  # frontiers settled by reduce without counting their solutions
+        self.snapshot = snapshot
+        self.engine = engine
+        if (executor is not None or pipeline) and cache is None:
+            cache = FrontierCache()
+        self.cache = cache
+        self.executor = executor
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.instrument = instrument
+        self.log = log
+        self.patterns = patterns
+        self._state = state
+        if backend is None:
+            from game.webbackend import WebDriverBackend
+            backend = WebDriverBackend(difficulty)
+        if instrument is not None:
+            backend = InstrumentedBackend(backend, instrument)
+        self._speculative: List[Set[Square]] = []  # frontiers to count while waiting on the board
+        # estimated counts of frontiers by their clues, kept until the next move
+        self._estimates: Dict[Hashable, Tuple[List[Square], csp.MineCounts]] = {}
+        if pipeline:
+            backend = PipelinedBackend(backend, self._prefetch)
+        # highlights are not held back, they show the moves about to be made
+        self.visualizer = Visualizer(backend) if visualize else None
+        self._backend = QueuedBackend(backend)
         if state:
             self.loadstate(state)
-        self.grid = Grid(self._webdriver, width, height)
+        self.grid = Grid(self._backend, width, height, snapshot, instrument)
 
     def loadstate(self, state: str):
-        action_chain = ActionChains(self._webdriver)
-        import_btn = self._webdriver.find_element_by_id('import-link')
-        action_chain.click(import_btn)
-        action_chain.send_keys(state)
-        action_chain.perform()
-        load_btn = self._webdriver.find_element_by_css_selector('input[value="Load Game"]')
-        action_chain = ActionChains(self._webdriver)
-        action_chain.send_keys_to_element(load_btn, Keys.ENTER)
-        action_chain.perform()
+        self._backend.loadstate(state)
 
     def restart(self):
+        self._speculative = []
+        self._estimates.clear()
+        self._state = None
         self.remaining_bombs = self.bombs
         self.game_over = False
-        action_chain = ActionChains(self._webdriver)
-        action_chain.send_keys(Keys.F2)
-        action_chain.perform()
-        self.grid = Grid(self._webdriver, self.width, self.height)
-        for sq in self.grid:
-            sq.unhighlight()
+        self.guesses = 0
+        self.searches_avoided = 0
+        if self.instrument is not None:
+            self.instrument.reset()
+        self._backend.restart()
+        self.grid = Grid(self._backend, self.width, self.height, self.snapshot, self.instrument)
+        if self.visualizer is not None:
+            self.visualizer.clear()
 
     def start(self):
+        if self.log is not None:
+            self.log.startgame(self.width, self.height, self.bombs, self._state)
         square = self.grid[self.height // 2][self.width // 2]
         self.game_over |= self.open([square])
 
+    def endgame(self, won: bool):
+        '''
+        Records the end of the game in the log along with the mines, from the backend if it knows
+        them and otherwise from the squares left unopened on the page.
+        '''
+        if self.log is None:
+            return
+        state = self._backend.exportstate()
+        if state is not None:
+            squares = serialize.cells(serialize.decodestate(state))
+            self.log.endgame(won, [i for i, (value, _, _) in enumerate(squares) if value < 0])
+            return
+        try:
+            classnames = self._backend.snapshot()
+        except GameWon:
+            # the win alert is dismissed by the first attempt
+            classnames = self._backend.snapshot()
+        # flags without a mine under them are shown as misflagged once a game is lost
+        mine_types = ('blank', 'bombflagged') if won else ('bombdeath', 'bombrevealed', 'bombflagged')
+        self.log.endgame(won, [
+            i for i, classname in enumerate(classnames[:self.width * self.height])
+            if classname.split(' ')[1] in mine_types
+        ])
+
     def close(self):
-        self._webdriver.close()
+        self._backend.close()
+
+    def savescreenshot(self):
+        self._backend.savescreenshot()
+
+    def report(self, **extra) -> Optional[Dict]:
+        '''
+        Returns the instrument's report of the game so far along with its guesses and searches
+        avoided, or None without an instrument.
+        '''
+        if self.instrument is None:
+            return None
+        return self.instrument.report(guesses=self.guesses, searches_avoided=self.searches_avoided, **extra)
+
+    def highlight(self, squares: Iterable[Square], color: str):
+        if self.visualizer is not None:
+            self.visualizer.highlight(squares, color)
 
+    def unhighlight(self, squares: Iterable[Square]):
+        if self.visualizer is not None:
+            self.visualizer.unhighlight(squares)
+
+    @timed('open')
     def open(self, squares: Set[Square]) -> bool:
-        for square in squares:
-            square.highlight('green')
-            game_over = self.grid.open(square)
-            square.unhighlight()
-            if game_over:
-                return True
+        if self.log is not None:
+            self.log.move('open', [square.index for square in squares])
+        self._estimates.clear()
+        self.highlight(squares, 'green')
+        if self.grid.openall(squares):
+            return True
+        self.unhighlight(squares)
         return False
     
+    @timed('reveal')
     def reveal(self, squares: Set[Square]) -> bool:
-        for square in squares:
-            square.highlight('darkgreen')
-            game_over = self.grid.reveal(square)
-            square.unhighlight()
-            if game_over:
-                return True
+        if self.log is not None and squares:
+            self.log.move('reveal', [square.index for square in squares])
+        self._estimates.clear()
+        self.highlight(squares, 'darkgreen')
+        if self.grid.revealall(squares):
+            return True
+        self.unhighlight(squares)
         return False
 
     def flag(self, square: Square):
+        if self.log is not None:
+            self.log.move('flag', [square.index])
+        self._estimates.clear()
         self.remaining_bombs -= 1
         return self.grid.flag(square)
     
+    @timed('frontiers')
     def getfrontiers(self) -> List[Set[Square]]:
         frontiers = self.grid.getfrontiers()
         frontiers_to_process = sorted(frontiers, key=lambda f: len(f), reverse=True)
         return frontiers_to_process
 
+    @timed('frontiers')
+    def getlivefrontiers(self, dead_frontier: List[Set[Square]]) -> List[Set[Square]]:
+        '''
+        Returns the frontiers left to process. Dead frontiers which have changed since they were
+        last processed are given another chance.
+        '''
+        dirty = self.grid.getdirtyfrontiers()
+        dead_frontier[:] = [f for f in dead_frontier if f not in dirty]
+        return [f for f in self.getfrontiers() if f not in dead_frontier]
+
     def attemptsolve(self) -> bool:
+        '''
+        Plays the game until it is lost, in which case False is returned. A win is signalled by the
+        backend raising GameWon.
+        '''
         dead_frontier = []
         frontiers = self.getfrontiers()
-        guess = (None, 0)
 
         while not self.game_over:
             if frontiers:
+                # settle every clue which needs no search before taking on a frontier
+                to_reveal = self.trivial()
+                if to_reveal:
+                    self.game_over |= self.reveal(to_reveal)
+                    frontiers = self.getlivefrontiers(dead_frontier)
+                    continue
+
                 frontier = frontiers.pop()
-                for sq in frontier:
-                    sq.highlight('blue')
+                self._speculative = list(frontiers)
+                self.highlight(frontier, 'blue')
 
-                to_open = set()
-                to_reveal = self.trivial(frontier)
-                if not to_reveal:
-                    to_reveal, to_open, f_highest_prob = self.bruteforce(frontier)
-                    guess = max(guess, f_highest_prob, key=lambda entry: entry[1])
+                remaining_bombs = self.remaining_bombs
+                to_reveal, to_open = self.reduce(frontier)
+                if to_reveal or to_open or remaining_bombs != self.remaining_bombs:
+                    self.searches_avoided += 1
+                else:
+                    self.presolve([frontier] + frontiers)
+                    to_reveal, to_open, _ = self.bruteforce(frontier)
 
                 if to_reveal:
                     # perform reveal and update frontiers
-                    if self.reveal(to_reveal):
-                        return False
-                    frontiers = [f for f in self.getfrontiers() if f not in dead_frontier]
+                    self.game_over |= self.reveal(to_reveal)
+                    frontiers = self.getlivefrontiers(dead_frontier)
                 
-                if to_open:
+                if to_open and not self.game_over:
                     # perform opening and update frontiers
-                    if self.open(to_open):
-                        return False
-                    frontiers = [f for f in self.getfrontiers() if f not in dead_frontier]
+                    self.game_over |= self.open(to_open)
+                    frontiers = self.getlivefrontiers(dead_frontier)
                 
                 if not to_reveal and not to_open:
-                    dead_frontier.append(frontier)
+                    if remaining_bombs != self.remaining_bombs:
+                        frontiers = self.getlivefrontiers(dead_frontier)
+                    else:
+                        dead_frontier.append(frontier)
                 
-                for sq in frontier:
-                    sq.unhighlight()
+                self.unhighlight(frontier)
                 
             else:
-                if guess[0]:
-                    # flag the guess square
-                    to_reveal = self.flag(guess[0])
+                blanks = self.grid.blanks()
+                if not blanks:
+                    break
 
-                elif self.remaining_bombs > 0:
-                    # make a random guess on a blank square
-                    blanks = list(filter(lambda sq: sq.char == Square.BLANK, self.grid))
-                    guess = blanks[0]
-                    to_reveal = self.flag(guess)
+                if self.remaining_bombs == 0:
+                    # every bomb is flagged, open all remaining blank squares
+                    self.game_over |= self.open(blanks)
+                    break
 
-        else:
-            # open all remaining blank squares
-            to_open = set(filter(lambda sq: sq.char == Square.BLANK, self.grid))
-            
+                # no frontier can progress on its own, use the whole board to make a move
+                to_reveal, to_open = self.guess(blanks)
+                self.game_over |= self.reveal(to_reveal)
+                if to_open and not self.game_over:
+                    self.game_over |= self.open(to_open)
+                dead_frontier = []
+                frontiers = self.getfrontiers()
+
+        return False
 
+    @timed('trivial')
+    def trivial(self) -> Set[Square]:
+        '''
+        Flags the blanks of every clue on the board which needs all of them to be bombs. Returns the
+        clues to reveal, i.e. those satisfied by the new flags or already satisfied.
+        '''
+        to_flag, to_reveal = self.grid.deduce()
+        to_reveal = set(to_reveal)
+        for blank in to_flag:
+            to_reveal.update(self.flag(blank))
+        return to_reveal
 
-    def trivial(self, frontier: Set[Square]) -> Set[Square]:
+    @timed('reduce')
+    def reduce(self, frontier: Set[Square]) -> Tuple[Set[Square], Set[Square]]:
+        '''
+        Flags and opens the blanks of the frontier which pairs of its clues settle, see csp.reduce.
+        Returns the clues to reveal and the blanks to open.
+        '''
+        frontier_blanks, constraints = self.createconstraints(frontier)
+        assignment = csp.reduce(constraints)
+        if assignment is None:
+            return set(), set()
+        mines, safe = assignment
         to_reveal: Set[Square] = set()
-        for clue_sq in filter(lambda s: s.clue, frontier):
-            blanks = list(filter(lambda s: s.char == Square.BLANK, clue_sq.adj))
-            if len(blanks) == clue_sq.clue:
-                for blank in blanks:
-                    to_reveal.update(self.flag(blank))
-        return to_reveal
+        for i in indices(mines):
+            to_reveal.update(self.flag(frontier_blanks[i]))
+        return to_reveal, set(frontier_blanks[i] for i in indices(safe))
 
+    @timed('bruteforce')
     def bruteforce(self, frontier) -> Tuple[Set[Square], Set[Square], Tuple[Optional[Square], int]]:
         to_reveal: Set[Square] = set()
         to_open: Set[Square] = set()
-        f_probs = self.getprobabilities(frontier)
+        f_probs = self.patterns.lookup(frontier) if self.patterns is not None else None
+        if f_probs is None:
+            frontier_blanks, counts = self.countmines(frontier)
+            f_probs = self._probabilities(frontier_blanks, counts)
+            if counts.stderr:
+                # an estimate settles nothing, leave the frontier to guess
+                return to_reveal, to_open, max(f_probs.items(), key=lambda entry: entry[1], default=(None, 0))
+        elif self.instrument is not None:
+            self.instrument.count('pattern_hits')
 
         # flag confirmed bombs
         for confirmed_bomb in filter(lambda sq: f_probs[sq] == 1, f_probs):
@@ -170,53 +346,259 @@ class Game:
 
         return to_reveal, to_open, f_highest_prob
 
-    def creatematrix(self, frontier: Set[Square]):
-        frontier_blanks: Set[Square] = set()
-        for clue_sq in frontier:
-            adj = filter(lambda s: s.char == Square.BLANK, clue_sq.adj)
-            frontier_blanks.update(adj)
-
-        clue_index_lookup = {}
-        i = 0
-        mat = []
-        row_lookup = []
-        col_lookup = []
-        for sq in frontier_blanks:
-            ranges = []
-            col_header = []
-            for clue_sq in filter(lambda s: s in frontier, sq.adj):
-                col_header.append(clue_sq)
-                if clue_sq not in clue_index_lookup:
-                    clue = clue_sq.clue
-                    clue_index_lookup[clue_sq] = (i, i + clue)
-                    i = i + clue
-                ranges.append(range(*clue_index_lookup[clue_sq]))
-            col_lookup.append(col_header)
-            
-            # generate all possible combinations, each combination is a row
-            for index_set in itertools.product(*ranges):
-                mat.append(index_set)
-                row_lookup.append(sq)
-        return mat, row_lookup, col_lookup, len(row_lookup), i
-
-    def getprobabilities(self, frontier):
-        probabilities = DefaultDict(lambda: 0)
-
-        mat, row_lookup, _, n_rows, n_cols = self.creatematrix(frontier)
-        node_matrix = createnodematrix(mat, n_rows, n_cols)
-        ret = []
-        exactcover(node_matrix, all_solutions=ret)
-
-        # get only unique solutions
-        unique_solutions = set([
-            frozenset(row_lookup[node.row] for node in solution)
-            for solution in ret
-        ])
+    def createconstraints(
+        self,
+        frontier: Set[Square],
+        frontier_blanks: Optional[List[Square]]=None
+    ) -> Tuple[List[Square], List[csp.Constraint]]:
+        '''
+        Returns the blanks adjacent to the frontier and a constraint for every clue in it, bit i of
+        a constraint standing for the i-th blank. The blanks are numbered in the given order if any.
+        '''
+        if frontier_blanks is None:
+            frontier_blanks = []
+        blank_bits = {blank: 1 << i for i, blank in enumerate(frontier_blanks)}
+        constraints = []
+        for clue_sq in filter(lambda s: s.clue, frontier):
+            mask = 0
+            for blank in filter(lambda s: s.char == Square.BLANK, clue_sq.adj):
+                if blank not in blank_bits:
+                    blank_bits[blank] = 1 << len(frontier_blanks)
+                    frontier_blanks.append(blank)
+                mask |= blank_bits[blank]
+            constraints.append((mask, clue_sq.clue))
+        return frontier_blanks, constraints
+
+    def createproblem(
+        self,
+        frontier: Set[Square],
+        frontier_blanks: Optional[List[Square]]=None
+    ) -> Tuple[List[Square], FrontierProblem]:
+        '''
+        Returns the blanks adjacent to the frontier and a description of the frontier which can be
+        solved without the board, e.g. in another process.
+        '''
+        frontier_blanks, constraints = self.createconstraints(frontier, frontier_blanks)
+        return frontier_blanks, FrontierProblem(len(frontier_blanks), tuple(constraints))
+
+    @timed('count')
+    def countmines(self, frontier: Set[Square]) -> Tuple[List[Square], csp.MineCounts]:
+        '''
+        Counts the bomb arrangements of the frontier. Returns the blanks adjacent to the frontier
+        along with the number of arrangements by number of bombs and how many of them have a bomb
+        on each blank.
+        '''
+        if self._estimates:
+            estimate = self._estimates.get(self._estimatekey(frontier))
+            if estimate is not None:
+                return estimate
+
+        if self.cache is None:
+            frontier_blanks, problem = self.createproblem(frontier)
+            counts = self._solve(problem)
+        else:
+            key, frontier_blanks = self._signature(frontier)
+            counts = self.cache.get(key)
+            if self.instrument is not None:
+                self.instrument.count('cache_misses' if counts is None else 'cache_hits')
+            if counts is None:
+                # number the blanks in the order of the signature so that the tallies can be shared
+                _, problem = self.createproblem(frontier, list(frontier_blanks))
+                counts = self._solve(problem)
+                if not counts.stderr:
+                    self.cache.put(key, counts)
+        if counts.stderr:
+            # e.g. a frontier estimated to no avail by bruteforce is not sampled again to guess
+            self._estimates[self._estimatekey(frontier)] = frontier_blanks, counts
+        return frontier_blanks, counts
+
+    def _estimatekey(self, frontier: Set[Square]) -> Hashable:
+        # the clues settle the frontier's blanks until the next move
+        return frozenset((sq, sq.clue) for sq in frontier if sq.clue)
+
+    def _prefetch(self) -> bool:
+        '''
+        Counts one of the frontiers left over from the last step which is missing from the cache.
+        Returns whether there may be more to count.
+        '''
+        while self._speculative:
+            frontier = self._speculative.pop()
+            if not any(sq.clue for sq in frontier):
+                continue
+            if self._signature(frontier)[0] in self.cache:
+                continue
+            assignment = csp.reduce(self.createconstraints(frontier)[1])
+            if assignment is None or assignment[0] | assignment[1]:
+                # reduce settles it without any counting
+                continue
+            self.countmines(frontier)
+            return True
+        return False
+
+    def _signature(self, frontier: Set[Square]) -> Tuple[Hashable, List[Square]]:
+        clues = [sq for sq in frontier if sq.clue]
+        blanks = list(set(adj for sq in clues for adj in sq.adj if adj.char == Square.BLANK))
+        return signature(clues, blanks)
+
+    @timed('presolve')
+    def presolve(self, frontiers: List[Set[Square]]):
+        '''
+        Solves the frontiers missing from the cache on the executor and adds them to the cache in
+        the order of the frontiers, so that the outcome does not depend on which worker finishes
+        first. Does nothing without an executor.
+        '''
+        if self.executor is None:
+            return
+        keys = []
+        problems = []
+        solved = []  # the frontier and its blanks behind every problem
+        for frontier in frontiers:
+            key, frontier_blanks = self._signature(frontier)
+            if key in self.cache or key in keys:
+                continue
+            if self._estimates and self._estimatekey(frontier) in self._estimates:
+                continue
+            keys.append(key)
+            problems.append(self.createproblem(frontier, list(frontier_blanks))[1])
+            solved.append((frontier, frontier_blanks))
+        if len(problems) < 2:
+            # not worth the round trip, countmines solves it in place
+            return
+        results = self.executor.map(
+            solver.countmines,
+            problems,
+            itertools.repeat(self.engine),
+            itertools.repeat(self.time_limit),
+            itertools.repeat(self.node_limit)
+        )
+        if self.instrument is not None:
+            self.instrument.count('presolved', len(problems))
+        for key, (frontier, frontier_blanks), counts in zip(keys, solved, results):
+            if counts.stderr:
+                self._estimates[self._estimatekey(frontier)] = frontier_blanks, counts
+            else:
+                self.cache.put(key, counts)
 
-        for solution in unique_solutions:
-            for square in solution:
-                probabilities[square] += 1
-        for square in probabilities:
-            probabilities[square] /= len(unique_solutions)
+    def _solve(self, problem: FrontierProblem) -> csp.MineCounts:
+        if self.instrument is None:
+            return solver.countmines(problem, self.engine, self.time_limit, self.node_limit)
 
+        # a budget without limits still counts the search nodes
+        budget = csp.Budget(self.time_limit, self.node_limit)
+        start = perf_counter()
+        with self.instrument.phase('search'):
+            counts = solver.countmines(problem, self.engine, budget=budget)
+        elapsed = perf_counter() - start
+        stats = {
+            'vars': problem.n_vars,
+            'constraints': len(problem.constraints),
+            'nodes': budget.spent,
+            'solutions': sum(counts.counts.values()),
+            'seconds': elapsed,
+            'estimated': bool(counts.stderr),
+        }
+        if self.engine != 'csp':
+            # the size of the exact cover matrix, built again just for the record
+            stats['rows'], stats['cols'] = solver.creatematrix(problem)[2:4]
+        self.instrument.addfrontier(**stats)
+        return counts
+
+    def getprobabilities(self, frontier) -> Dict[Square, float]:
+        return self._probabilities(*self.countmines(frontier))
+
+    def _probabilities(self, frontier_blanks: List[Square], counts: csp.MineCounts) -> Dict[Square, float]:
+        n_solutions = sum(counts.counts.values())
+        probabilities = {}
+        for blank_num, blank in enumerate(frontier_blanks):
+            tally = sum(tallies[blank_num] for tallies in counts.tallies.values())
+            if tally:
+                probabilities[blank] = tally / n_solutions
         return probabilities
+
+    def getglobalprobabilities(
+        self,
+        frontiers: List[Set[Square]],
+        blanks: List[Square]
+    ) -> Tuple[Dict[Square, float], List[Square], float, Dict[Square, float]]:
+        '''
+        Returns the probability of a bomb on every frontier blank given the remaining bombs, the
+        interior blanks which are not adjacent to any clue, the probability of a bomb on each
+        interior blank and the standard error of the frontier blanks whose counts were estimated.
+        '''
+        self.presolve(frontiers)
+        results = [self.countmines(frontier) for frontier in frontiers]
+        frontier_blanks = set(blank for f_blanks, _ in results for blank in f_blanks)
+        interior = [sq for sq in blanks if sq not in frontier_blanks]
+
+        f_probs, interior_prob = probability.globalprobabilities(
+            [counts for _, counts in results],
+            len(interior),
+            self.remaining_bombs
+        )
+        probabilities = {}
+        errors = {}
+        for (f_blanks, counts), probs in zip(results, f_probs):
+            probabilities.update(zip(f_blanks, probs))
+            if counts.stderr:
+                errors.update((blank, counts.stderr) for blank in f_blanks)
+        return probabilities, interior, interior_prob, errors
+
+    @timed('guess')
+    def guess(self, blanks: List[Square]) -> Tuple[Set[Square], Set[Square]]:
+        '''
+        Makes a move when no frontier can progress on its own. Squares settled by the remaining bomb
+        count are flagged or opened. Otherwise the less risky of flagging the likeliest bomb and
+        opening the likeliest safe square is taken, estimated probabilities included. Returns the
+        squares to reveal and to open.
+        '''
+        remaining_bombs = self.remaining_bombs
+        probabilities, interior, interior_prob, errors = self.getglobalprobabilities(self.getfrontiers(), blanks)
+
+        # estimated probabilities only ever inform a guess
+        exact = [(sq, prob) for sq, prob in probabilities.items() if sq not in errors]
+        to_reveal: Set[Square] = set()
+        for confirmed_bomb in [sq for sq, prob in exact if prob == 1]:
+            to_reveal.update(self.flag(confirmed_bomb))
+        to_open = set(sq for sq, prob in exact if prob == 0)
+        if interior and not errors:
+            if interior_prob == 0:
+                to_open.update(interior)
+            elif interior_prob == 1:
+                for confirmed_bomb in interior:
+                    to_reveal.update(self.flag(confirmed_bomb))
+        if to_reveal or to_open or remaining_bombs != self.remaining_bombs:
+            return to_reveal, to_open
+
+        self.guesses += 1
+        open_candidates = list(probabilities.items()) + [(sq, interior_prob) for sq in interior]
+        if not open_candidates:
+            # make a random guess on a blank square
+            self._logguess(blanks[0], None, probabilities, interior_prob)
+            return self.flag(blanks[0]), set()
+
+        # prefer squares with fewer neighbours when opening, they are more likely to free up space.
+        # Remaining ties are broken by position so that games can be reproduced.
+        best_flag = max(
+            probabilities.items(),
+            key=lambda entry: (entry[1], -entry[0].y, -entry[0].x),
+            default=(None, 0)
+        )
+        best_open = min(
+            open_candidates,
+            key=lambda entry: (entry[1], len(entry[0].adj), entry[0].y, entry[0].x)
+        )
+        if best_flag[0] is not None and 1 - best_flag[1] <= best_open[1]:
+            self._logguess(best_flag[0], best_flag[1], probabilities, interior_prob)
+            return self.flag(best_flag[0]), set()
+        self._logguess(best_open[0], best_open[1], probabilities, interior_prob)
+        return set(), set([best_open[0]])
+
+    def _logguess(self, square: Square, probability: Optional[float], probabilities: Dict[Square, float], interior_prob: float):
+        if self.log is not None:
+            self.log.move(
+                'guess',
+                [square.index],
+                p=probability,
+                probabilities=sorted([sq.index, round(prob, 4)] for sq, prob in probabilities.items()),
+                interior=round(interior_prob, 4)
+            )
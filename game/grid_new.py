@@ -1,16 +1,54 @@
-from typing import List, Set, Tuple
-from selenium.webdriver.remote.webdriver import WebDriver
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from game import board, serialize
+from game.backend import BoardView
+from game.board import BoardState, indices
+from game.instrument import Instrument, timed
 from game.square_new import Square
 
 
+POSITION_KINDS = {
+    board.BLANK: serialize.BLANK,
+    board.FLAG: serialize.FLAG,
+    board.OPEN: serialize.OPEN,
+    board.BOMBDEATH: serialize.BOMB,
+    board.BOMBREVEALED: serialize.BOMB,
+}
+
+
 class Grid:
-    def __init__(self, webdriver: WebDriver, width: int, height: int) -> None:
+    def __init__(
+        self,
+        backend: BoardView,
+        width: int,
+        height: int,
+        snapshot: bool=False,
+        instrument: Optional[Instrument]=None
+    ) -> None:
+        '''
+        In snapshot mode the grid is refreshed from a single snapshot of every square's class rather
+        than one backend call per square. The state of the squares is held by self.board and their
+        elements by the grid, the squares themselves are only views onto an index. The instrument, if any, times the grid's phases. A grid
+        on a BoardView which is not a Backend, e.g. a PositionView, can only be looked at.
+        '''
         self.width = width
         self.height = height
-        self._webdriver = webdriver
-        self.squares = []
+        self.snapshot = snapshot
+        self.instrument = instrument
+        self._backend = backend
+        self._classnames: List[Optional[str]] = [None] * (width * height)
+        self._elements: List[Any] = []
+        self.board = BoardState(width, height)
+        self._squares: List[Square] = []
+        self.squares: List[List[Square]] = []
         self._getsquares()
+        # a board loaded with flags on it shows clues before the flags around them are taken off
+        for square in self:
+            if square.clue:
+                square.decrementclue(self.board.countflags(square.index))
         self.clues = set(square for square in self if square.clue)
+        self._frontiers = FrontierIndex(self._linked)
+        for clue in self.clues:
+            self._frontiers.add(clue)
     
     def __getitem__(self, key):
         return self.squares[key]
@@ -19,38 +57,98 @@ class Grid:
         self.squares[key] = item
     
     def __iter__(self):
-        return GridIterator(self)
+        return iter(self._squares)
     
     def __str__(self):
         return '\n'.join(' '.join(map(str, row)) for row in self.squares)
 
-    def _getadj(self, square: Square, filter=lambda sq: True) -> Tuple[Square]:
-        adj = []
-        for dy in range(-1, 2):
-            dsty = square.y + dy
-            if dsty >= 0 and dsty < self.height:
-                for dx in range(-1, 2):
-                    dstx = square.x + dx
-                    if (dstx >= 0 and dstx < self.width) and (dy != 0 or dx != 0):
-                        if filter(self.squares[dsty][dstx]):
-                            adj.append(self.squares[dsty][dstx])
-        return tuple(adj)  # TODO change this to yield
-
     def _getsquares(self):
-        square_elements = self._webdriver.find_elements_by_class_name('square')
+        self._elements = self._backend.squares()[:self.width * self.height]
+        if self.snapshot:
+            self._classnames = self._backend.snapshot()[:self.width * self.height]
+        self._squares = [Square(self, index, self._classnames[index]) for index in range(len(self._elements))]
         self.squares = [
-            [
-                Square(col_index, row_index, element, self._webdriver) 
-                for col_index, element in enumerate(
-                    square_elements[row_index * self.width:row_index * self.width + self.width]
-                )
-            ]
+            self._squares[row_index * self.width:row_index * self.width + self.width]
             for row_index in range(self.height)
         ]
-        for square in self:
-            square.adj = self._getadj(square)
 
-    def getfrontiers(self) -> List[Set[Square]]:
+    def position(self) -> bytes:
+        '''
+        Returns the board as the solver sees it in the compact form of serialize.py. Clues are
+        stored as shown on the page, i.e. before they are reduced by the flags around them.
+        '''
+        kinds = [POSITION_KINDS[kind] for kind in self.board.kinds]
+        clues = [
+            clue + self.board.countflags(index) if clue >= 0 else clue
+            for index, clue in enumerate(self.board.clues)
+        ]
+        return serialize.encodeposition(self.width, self.height, kinds, clues)
+
+    def blanks(self) -> List[Square]:
+        '''
+        Returns the blank squares row by row.
+        '''
+        return [self._squares[i] for i in indices(self.board.blank)]
+
+    def flags(self) -> List[Square]:
+        return [self._squares[i] for i in indices(self.board.flag)]
+
+    @timed('grid.deduce')
+    def deduce(self) -> Tuple[List[Square], List[Square]]:
+        '''
+        Returns the blanks which are bombs and the clues which are satisfied according to their own
+        value alone, for the whole board in one pass. See BoardState.trivial.
+        '''
+        to_flag, to_reveal = self.board.trivial()
+        return (
+            [self._squares[i] for i in indices(to_flag)],
+            [self._squares[i] for i in indices(to_reveal)]
+        )
+
+    def _linked(self, clue: Square) -> List[Square]:
+        '''
+        Returns the clues sharing a blank with the clue. Only these constrain each other, so
+        frontiers are the connected components of clues and blanks.
+        '''
+        around = 0
+        for blank in indices(self.board.blank & self.board.neighbour_masks[clue.index]):
+            around |= self.board.neighbour_masks[blank]
+        around &= self.board.unsatisfied() & ~(1 << clue.index)
+        return [self._squares[i] for i in indices(around)]
+
+    def _unlink(self, square: Square):
+        # the square is no longer a blank linking the clues around it
+        if (self.board.neighbour_masks[square.index] & self.board.unsatisfied()).bit_count() > 1:
+            self._frontiers.split(square.adj)
+
+    def _addclue(self, clue: Square):
+        self.clues.add(clue)
+        self._frontiers.add(clue)
+
+    def _removeclue(self, clue: Square):
+        self.clues.remove(clue)
+        self._frontiers.remove(clue)
+
+    @timed('grid.frontiers')
+    def getfrontiers(self) -> List[FrozenSet[Square]]:
+        '''
+        Returns the current frontiers. These are kept up to date as clues change, so only frontiers
+        touched since the last call are rebuilt.
+        '''
+        return self._frontiers.frontiers()
+
+    @timed('grid.frontiers')
+    def getdirtyfrontiers(self) -> List[FrozenSet[Square]]:
+        '''
+        Returns the frontiers which have gained or lost clues, or whose clues have changed value,
+        since the last call.
+        '''
+        return self._frontiers.dirty()
+
+    def computefrontiers(self) -> List[Set[Square]]:
+        '''
+        Computes the frontiers from scratch.
+        '''
         frontiers = []
         clues = self.clues.copy()
         while clues:
@@ -65,33 +163,67 @@ class Grid:
         to_process: List[Square] = [clue]
         while to_process:
             current = to_process.pop()
-            for adj in filter(lambda sq: sq.clue and sq not in frontier, current.adj):
+            for adj in filter(lambda sq: sq not in frontier, self._linked(current)):
                 frontier.add(adj)
                 to_process.append(adj)
         return frontier
 
+    @timed('grid.refresh')
     def open(self, square: Square) -> bool:
         if square.char == Square.BLANK:
             square.click()
             return self.refresh(square)
         return False
 
+    @timed('grid.flag')
     def flag(self, square: Square) -> Set[Square]:
         square.flag()
+        self._unlink(square)
         ret: Set[Square] = set()
         for adj in square.adj:
-            if adj.clue and adj.decrementclue() == 0:
-                self.clues.remove(adj)
-                ret.add(adj)
+            if adj.clue:
+                if adj.decrementclue() == 0:
+                    self._removeclue(adj)
+                    ret.add(adj)
+                else:
+                    self._frontiers.touch(adj)
         return ret
 
+    @timed('grid.refresh')
     def reveal(self, square: Square) -> bool:
         square.reveal()
+        if self.snapshot:
+            return self._refreshsnapshot()
         for adj in filter(lambda sq: sq.char == Square.BLANK, square.adj):
             if self.refresh(adj):
                 return True
         return False
 
+    @timed('grid.refresh')
+    def openall(self, squares: Iterable[Square]) -> bool:
+        '''
+        Opens the squares. In snapshot mode every click is made before the board is read back once,
+        so that a backend which queues its moves sends them together. Returns whether the game is
+        over.
+        '''
+        if not self.snapshot:
+            return any(self.open(square) for square in squares)
+        for square in squares:
+            if square.char == Square.BLANK:
+                square.click()
+        return self._refreshsnapshot()
+
+    @timed('grid.refresh')
+    def revealall(self, squares: Iterable[Square]) -> bool:
+        '''
+        Reveals the clues, in snapshot mode with a single refresh after all of them as in openall.
+        '''
+        if not self.snapshot:
+            return any(self.reveal(square) for square in squares)
+        for square in squares:
+            square.reveal()
+        return self._refreshsnapshot()
+
     def _refresh_reveal_helper(self, square: Square, refreshed: Set[Square]):
         square.reveal()
         for adj in filter(lambda sq: sq.char == Square.BLANK, square.adj):
@@ -99,18 +231,63 @@ class Grid:
                 return True
         return False
 
-    def refresh(self, start: Square, refreshed: Set[Square]=set()) -> bool:
+    def _diffsnapshot(self) -> List[Tuple[Square, str]]:
+        '''
+        Takes a snapshot of the board and returns the squares whose class has changed since the
+        previous one along with their new class.
+        '''
+        classnames = self._backend.snapshot()[:self.width * self.height]
+        changed = [
+            (self._squares[i], new)
+            for i, (old, new) in enumerate(zip(self._classnames, classnames))
+            if old != new
+        ]
+        self._classnames = classnames
+        return changed
+
+    def _refreshsnapshot(self) -> bool:
+        '''
+        Applies the changes of every square on the board, revealing clues which are satisfied by
+        existing flags until the board settles. Returns whether the game is over.
+        '''
+        while True:
+            to_reveal: List[Square] = []
+            for current, classname in self._diffsnapshot():
+                if not current.refresh(classname):
+                    continue
+                if current.char in (Square.BOMBDEATH, Square.BOMBREVEALED):
+                    return True
+                self._unlink(current)
+                if current.clue:
+                    adj_flags = self.board.countflags(current.index)
+                    # update clue to reflect remaining value
+                    if current.decrementclue(adj_flags):
+                        self._addclue(current)
+                    else:
+                        to_reveal.append(current)
+            if not to_reveal:
+                return False
+            for square in to_reveal:
+                square.reveal()
+
+    @timed('grid.refresh')
+    def refresh(self, start: Square, refreshed: Optional[Set[Square]]=None) -> bool:
+        if self.snapshot:
+            return self._refreshsnapshot()
+        if refreshed is None:
+            refreshed = set()
         to_refresh = [start]
         while to_refresh:
             current = to_refresh.pop()
             if current not in refreshed and current.refresh():
                 if current.char in (Square.BOMBDEATH, Square.BOMBREVEALED):
                     return True
+                self._unlink(current)
                 if current.clue:
-                    adj_flags = len(list(filter(lambda sq: sq.char == Square.FLAG, current.adj)))
+                    adj_flags = self.board.countflags(current.index)
                     # update clue to reflect remaining value
                     if current.decrementclue(adj_flags):
-                        self.clues.add(current)
+                        self._addclue(current)
                     elif self._refresh_reveal_helper(current, refreshed):
                         return True
                 else:
@@ -118,19 +295,107 @@ class Grid:
                     refreshed.add(current)
         return False
 
-class GridIterator:
-    def __init__(self, grid: Grid):
-        self.grid = grid
-        self.row_index = 0
-        self.col_index = 0
-
-    def __next__(self):
-        if self.row_index < self.grid.height:
-            if self.col_index < self.grid.width:
-                res = self.grid[self.row_index][self.col_index]
-                self.col_index = (self.col_index + 1) % self.grid.width
-                if self.col_index == 0:
-                    self.row_index += 1
-            return res
-        raise StopIteration
 
+class FrontierIndex:
+    '''
+    Groups clues into frontiers incrementally. Adding a clue merges the frontiers of the clues it is
+    linked to and removing one only re-splits its own frontier, so the cost of an update depends on
+    the squares that changed rather than on every clue on the board. Frontiers whose links may have
+    been cut are marked by split and re-split the next time the frontiers are asked for.
+    '''
+    def __init__(self, linked: Callable[[Square], Iterable[Square]]) -> None:
+        self._linked = linked
+        self._ids: Dict[Square, int] = {}
+        self._members: Dict[int, Set[Square]] = {}
+        self._frozen: Dict[int, FrozenSet[Square]] = {}
+        self._dirty: Set[int] = set()
+        self._stale: Set[int] = set()
+        self._next_id = 0
+
+    def __contains__(self, clue: Square) -> bool:
+        return clue in self._ids
+
+    def _newfrontier(self, members: Set[Square]) -> int:
+        frontier_id = self._next_id
+        self._next_id += 1
+        self._members[frontier_id] = members
+        for clue in members:
+            self._ids[clue] = frontier_id
+        self._dirty.add(frontier_id)
+        return frontier_id
+
+    def _dropfrontier(self, frontier_id: int) -> Set[Square]:
+        self._frozen.pop(frontier_id, None)
+        self._dirty.discard(frontier_id)
+        self._stale.discard(frontier_id)
+        return self._members.pop(frontier_id)
+
+    def add(self, clue: Square) -> None:
+        if clue in self._ids:
+            self.touch(clue)
+            return
+        frontier_ids = set(self._ids[adj] for adj in self._linked(clue) if adj in self._ids)
+        if not frontier_ids:
+            self._newfrontier(set([clue]))
+            return
+
+        # merge the smaller frontiers into the largest one
+        target = max(frontier_ids, key=lambda frontier_id: len(self._members[frontier_id]))
+        if frontier_ids & self._stale:
+            self._stale.add(target)
+        for frontier_id in frontier_ids - set([target]):
+            for member in self._dropfrontier(frontier_id):
+                self._ids[member] = target
+                self._members[target].add(member)
+        self._members[target].add(clue)
+        self._ids[clue] = target
+        self._frozen.pop(target, None)
+        self._dirty.add(target)
+
+    def remove(self, clue: Square) -> None:
+        members = self._dropfrontier(self._ids.pop(clue))
+        members.discard(clue)
+        self._resplit(members)
+
+    def _resplit(self, members: Set[Square]) -> None:
+        # whatever is left of the frontier may have been split in several
+        while members:
+            start = members.pop()
+            frontier: Set[Square] = set([start])
+            to_process: List[Square] = [start]
+            while to_process:
+                current = to_process.pop()
+                for adj in self._linked(current):
+                    if adj in members:
+                        members.remove(adj)
+                        frontier.add(adj)
+                        to_process.append(adj)
+            self._newfrontier(frontier)
+
+    def touch(self, clue: Square) -> None:
+        '''
+        Marks the frontier of the clue as changed.
+        '''
+        if clue in self._ids:
+            self._dirty.add(self._ids[clue])
+
+    def split(self, clues: Iterable[Square]) -> None:
+        '''
+        Marks the frontiers of the clues as possibly split, e.g. because a blank linking them has
+        been opened or flagged.
+        '''
+        self._stale.update(self._ids[clue] for clue in clues if clue in self._ids)
+
+    def frontiers(self) -> List[FrozenSet[Square]]:
+        for frontier_id in sorted(self._stale):
+            self._resplit(self._dropfrontier(frontier_id))
+        for frontier_id, members in self._members.items():
+            if frontier_id not in self._frozen:
+                self._frozen[frontier_id] = frozenset(members)
+        return list(self._frozen.values())
+
+    def dirty(self) -> List[FrozenSet[Square]]:
+        self.frontiers()
+        dirty = [self._frozen[frontier_id] for frontier_id in self._dirty]
+        self._dirty.clear()
+        return dirty
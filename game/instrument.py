@@ -0,0 +1,189 @@
+'''
+Per-phase timing and counters for a game. An Instrument records the wall time and number of calls
+of every phase, counters such as cache hits, and the size and search effort of every frontier
+counted. Nothing is recorded, and no time is spent, unless an Instrument is given to the Game:
+methods marked with timed only check for one before going straight to the method.
+
+Reports are written as one JSON object per line per game, which aggregate adds up.
+'''
+import functools
+import json
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Iterable, Iterator, List
+from game.backend import Backend
+
+
+class Instrument:
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.frontiers: List[Dict[str, Any]] = []
+        self._active: Dict[str, int] = {}
+
+    def reset(self) -> None:
+        self.seconds.clear()
+        self.calls.clear()
+        self.counters.clear()
+        self.frontiers.clear()
+        self._active.clear()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        '''
+        Times the enclosed block as the named phase. A phase entered again from within itself, e.g.
+        by recursion, is only timed and counted once.
+        '''
+        if self._active.get(name):
+            yield
+            return
+        self._active[name] = 1
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + perf_counter() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self._active[name] = 0
+
+    def count(self, name: str, n: int=1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def addfrontier(self, **stats) -> None:
+        '''
+        Records the statistics of a frontier which has been counted, e.g. its variables, search
+        nodes and solutions.
+        '''
+        self.frontiers.append(stats)
+
+    def report(self, **extra) -> Dict[str, Any]:
+        ret = dict(extra)
+        ret['phases'] = {
+            name: {'seconds': self.seconds[name], 'calls': self.calls[name]}
+            for name in sorted(self.seconds)
+        }
+        ret['counters'] = dict(sorted(self.counters.items()))
+        ret['frontiers'] = list(self.frontiers)
+        return ret
+
+
+def timed(name: str):
+    '''
+    Times the decorated method as the named phase when its object has an instrument.
+    '''
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.instrument is None:
+                return method(self, *args, **kwargs)
+            with self.instrument.phase(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class InstrumentedBackend(Backend):
+    '''
+    Times every call to the wrapped backend as an 'io.<method>' phase, which separates the time
+    spent talking to the browser from the time spent solving.
+    '''
+    def __init__(self, backend: Backend, instrument: Instrument) -> None:
+        self.backend = backend
+        self.instrument = instrument
+
+    @timed('io.squares')
+    def squares(self):
+        return self.backend.squares()
+
+    @timed('io.getclass')
+    def getclass(self, element) -> str:
+        return self.backend.getclass(element)
+
+    @timed('io.snapshot')
+    def snapshot(self):
+        return self.backend.snapshot()
+
+    @timed('io.click')
+    def click(self, element) -> None:
+        self.backend.click(element)
+
+    @timed('io.flag')
+    def flag(self, element) -> None:
+        self.backend.flag(element)
+
+    @timed('io.chord')
+    def chord(self, element) -> None:
+        self.backend.chord(element)
+
+    @timed('io.perform')
+    def perform(self, moves) -> None:
+        self.backend.perform(moves)
+
+    @timed('io.execute_script')
+    def execute_script(self, script: str):
+        return self.backend.execute_script(script)
+
+    @timed('io.loadstate')
+    def loadstate(self, state: str) -> None:
+        self.backend.loadstate(state)
+
+    @timed('io.restart')
+    def restart(self) -> None:
+        self.backend.restart()
+
+    @timed('io.savescreenshot')
+    def savescreenshot(self) -> None:
+        self.backend.savescreenshot()
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def alive(self) -> bool:
+        return self.backend.alive()
+
+    def exportstate(self):
+        return self.backend.exportstate()
+
+
+def writereport(path: str, report: Dict[str, Any]) -> None:
+    '''
+    Appends the report to the JSON lines file.
+    '''
+    with open(path, 'a') as f:
+        f.write(json.dumps(report) + '\n')
+
+
+def readreports(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def aggregate(reports: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    '''
+    Adds up the phases, counters and frontiers of several game reports.
+    '''
+    phases: Dict[str, Dict[str, float]] = {}
+    counters: Dict[str, int] = {}
+    frontiers = {'count': 0, 'vars': 0, 'nodes': 0, 'estimated': 0, 'max_vars': 0, 'max_nodes': 0}
+    n_games = 0
+    for report in reports:
+        n_games += 1
+        for name, phase in report['phases'].items():
+            total = phases.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            total['seconds'] += phase['seconds']
+            total['calls'] += phase['calls']
+        for name, value in report['counters'].items():
+            counters[name] = counters.get(name, 0) + value
+        for frontier in report['frontiers']:
+            frontiers['count'] += 1
+            for key in ('vars', 'nodes', 'estimated'):
+                frontiers[key] += frontier.get(key) or 0
+            frontiers['max_vars'] = max(frontiers['max_vars'], frontier.get('vars') or 0)
+            frontiers['max_nodes'] = max(frontiers['max_nodes'], frontier.get('nodes') or 0)
+    return {
+        'games': n_games,
+        'phases': dict(sorted(phases.items(), key=lambda item: -item[1]['seconds'])),
+        'counters': counters,
+        'frontiers': frontiers,
+    }
@@ -0,0 +1,126 @@
+'''
+Overlaps the round trips to the board with solving. Backend calls are run one at a time, in the
+order they are made, on an asyncio event loop in a thread of its own. Moves are sent without
+waiting for them while reads wait for their result, so by the time a read returns every move made
+before it has been made. While a read is outstanding the caller may be given other work to do, see
+PipelinedBackend.idle.
+
+Errors raised by a move, e.g. GameWon, are raised again by the next read and every call in
+between is skipped, as the board they were meant for has gone.
+'''
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+from game.backend import Backend
+
+
+class IOPipeline:
+    def __init__(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._error: Optional[BaseException] = None
+        self._last: Optional[Future] = None
+
+    async def _run(self, fn: Callable, args: Tuple) -> Any:
+        # nothing is awaited before the call, so calls run whole and in the order they were made
+        if self._error is not None:
+            raise self._error
+        try:
+            return fn(*args)
+        except BaseException as e:
+            self._error = e
+            raise
+
+    def submit(self, fn: Callable, *args) -> Future:
+        self._last = asyncio.run_coroutine_threadsafe(self._run(fn, args), self._loop)
+        return self._last
+
+    def call(self, fn: Callable, *args) -> Any:
+        return self.submit(fn, *args).result()
+
+    def drain(self) -> None:
+        '''
+        Waits for every call made so far and raises the error of a failed one, if any.
+        '''
+        if self._last is not None:
+            self._last.exception()
+        if self._error is not None:
+            raise self._error
+
+    def reset(self) -> None:
+        '''
+        Waits for every call made so far and forgets any error, e.g. before starting a new game.
+        '''
+        if self._last is not None:
+            self._last.exception()
+        self._error = None
+
+    def close(self) -> None:
+        self.reset()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class PipelinedBackend(Backend):
+    '''
+    Sends the calls to the wrapped backend through an IOPipeline. Reads wait for their result and,
+    while they do, call idle until it returns False so that the caller can get on with other work.
+    '''
+    def __init__(self, backend: Backend, idle: Optional[Callable[[], bool]]=None) -> None:
+        self.backend = backend
+        self.idle = idle
+        self._pipeline = IOPipeline()
+
+    def _read(self, fn: Callable, *args) -> Any:
+        future = self._pipeline.submit(fn, *args)
+        while not future.done() and self.idle is not None and self.idle():
+            pass
+        return future.result()
+
+    def squares(self) -> List[Any]:
+        return self._read(self.backend.squares)
+
+    def getclass(self, element) -> str:
+        return self._read(self.backend.getclass, element)
+
+    def snapshot(self) -> List[str]:
+        return self._read(self.backend.snapshot)
+
+    def click(self, element) -> None:
+        self._pipeline.submit(self.backend.click, element)
+
+    def flag(self, element) -> None:
+        self._pipeline.submit(self.backend.flag, element)
+
+    def chord(self, element) -> None:
+        self._pipeline.submit(self.backend.chord, element)
+
+    def perform(self, moves: List[Tuple[str, Any]]) -> None:
+        self._pipeline.submit(self.backend.perform, moves)
+
+    def execute_script(self, script: str) -> Any:
+        return self._pipeline.call(self.backend.execute_script, script)
+
+    def loadstate(self, state: str) -> None:
+        self._pipeline.reset()
+        self._pipeline.call(self.backend.loadstate, state)
+
+    def restart(self) -> None:
+        self._pipeline.reset()
+        self._pipeline.call(self.backend.restart)
+
+    def savescreenshot(self) -> None:
+        self._pipeline.call(self.backend.savescreenshot)
+
+    def alive(self) -> bool:
+        return self._pipeline.call(self.backend.alive)
+
+    def exportstate(self) -> Optional[str]:
+        return self._pipeline.call(self.backend.exportstate)
+
+    def close(self) -> None:
+        self._pipeline.close()
+        self.backend.close()
@@ -0,0 +1,153 @@
+'''
+Keeps several backends, e.g. browser sessions, warm so that games can be played on them at the same
+time. A session is handed to one game at a time, restarted when the game gives it back and replaced
+when it fails its health check or has played its share of games. Should the factory keep failing
+a session's slot is given up, and once every slot is gone acquire raises PoolExhausted.
+
+    pool = SessionPool(lambda: WebDriverBackend('', url='file:///path/to/minesweeper.html'), 4)
+    results = pool.play(playgame, 100)
+'''
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+from game.backend import Backend, GameWon
+
+
+T = TypeVar('T')
+
+# times the factory is tried when replacing a session before the session's slot is given up
+FACTORY_ATTEMPTS = 3
+
+
+class PoolExhausted(Exception):
+    '''
+    Raised by acquire once every session has been lost to a failing factory.
+    '''
+    pass
+
+
+class SessionPool:
+    def __init__(
+        self,
+        factory: Callable[[], Backend],
+        size: int,
+        max_games: Optional[int]=None
+    ) -> None:
+        '''
+        Creates size sessions with the factory up front. A session is replaced after max_games
+        games if given, browsers tend to slow down the longer they run.
+        '''
+        self.size = size
+        self.max_games = max_games
+        self.replaced = 0  # sessions replaced for failing their health check or their age
+        self.lost = 0  # sessions which could not be replaced as the factory kept failing
+        self._factory = factory
+        self._idle: queue.Queue = queue.Queue()
+        self._games: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            self._add(factory())
+
+    def _add(self, backend: Backend) -> None:
+        with self._lock:
+            self._games[id(backend)] = 0
+        self._idle.put(backend)
+
+    def acquire(self, timeout: Optional[float]=None) -> Backend:
+        '''
+        Returns an idle session which passes its health check, waiting for one if every session is
+        in use. Raises queue.Empty on timeout and PoolExhausted if there are no sessions left.
+        '''
+        while True:
+            backend = self._idle.get(timeout=timeout)
+            if isinstance(backend, PoolExhausted):
+                # left in the queue for every other caller waiting
+                self._idle.put(backend)
+                raise backend
+            if backend.alive():
+                return backend
+            self._replace(backend)
+
+    def release(self, backend: Backend) -> None:
+        '''
+        Restarts the session for the next game and returns it to the pool, or replaces it if it is
+        too old or no longer works.
+        '''
+        if self._closed:
+            backend.close()
+            return
+        with self._lock:
+            self._games[id(backend)] += 1
+            games = self._games[id(backend)]
+        if self.max_games is not None and games >= self.max_games:
+            self._replace(backend)
+            return
+        try:
+            backend.restart()
+        except GameWon:
+            # the win alert was still showing, the restart goes through once it is dismissed
+            backend.restart()
+        except Exception:
+            self._replace(backend)
+            return
+        self._idle.put(backend)
+
+    def _replace(self, backend: Backend) -> None:
+        with self._lock:
+            self._games.pop(id(backend), None)
+            self.replaced += 1
+        try:
+            backend.close()
+        except Exception:
+            pass
+        error = None
+        for _ in range(FACTORY_ATTEMPTS):
+            try:
+                new_backend = self._factory()
+            except Exception as e:
+                error = e
+                continue
+            self._add(new_backend)
+            return
+
+        with self._lock:
+            self.lost += 1
+            exhausted = self.lost == self.size
+        if exhausted:
+            # wake up acquire rather than leave it waiting for a session which will never come
+            exhausted_error = PoolExhausted(f'all {self.size} sessions lost, the factory failed with {error!r}')
+            exhausted_error.__cause__ = error
+            self._idle.put(exhausted_error)
+
+    @contextmanager
+    def session(self) -> Iterator[Backend]:
+        backend = self.acquire()
+        try:
+            yield backend
+        finally:
+            self.release(backend)
+
+    def play(self, game: Callable[[Backend], T], n_games: int) -> List[T]:
+        '''
+        Plays n_games with one worker thread per session and returns the results of game, which is
+        called with the session to play on, in the order the games were started.
+        '''
+        def worker(_) -> T:
+            with self.session() as backend:
+                return game(backend)
+
+        with ThreadPoolExecutor(self.size) as executor:
+            return list(executor.map(worker, range(n_games)))
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                backend = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if not isinstance(backend, PoolExhausted):
+                backend.close()
@@ -0,0 +1,85 @@
+'''
+Combines the solutions of independent frontiers into probabilities for the whole board. A frontier
+arrangement with k bombs leaves (remaining bombs - k) for the rest of the board, so arrangements are
+weighted by the number of ways the other frontiers and the interior (blanks not adjacent to any
+clue) can hold the rest. Frontiers are combined by convolving their counts per number of bombs,
+which is polynomial in the number of bombs rather than the product of the frontiers' solutions.
+'''
+from math import comb
+from typing import Dict, List, Tuple
+from game.csp import MineCounts
+
+
+def convolve(a: List[int], b: List[int]) -> List[int]:
+    '''
+    Returns the distribution of the number of bombs of two independent frontiers, a[k] and b[k]
+    being the number of arrangements with k bombs.
+    '''
+    ret = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                ret[i + j] += x * y
+    return ret
+
+
+def todistribution(counts: Dict[int, int]) -> List[int]:
+    dist = [0] * (max(counts, default=0) + 1)
+    for n_bombs, count in counts.items():
+        dist[n_bombs] = count
+    return dist
+
+
+def globalprobabilities(
+    frontier_counts: List[MineCounts],
+    n_interior: int,
+    remaining_bombs: int
+) -> Tuple[List[List[float]], float]:
+    '''
+    Returns the probability of a bomb on every variable of every frontier and on any interior
+    square. If the counts cannot be reconciled with the remaining bombs, the frontiers are weighted
+    as if there was no limit. Should a frontier have no solutions at all, every list is empty.
+    '''
+    dists = [todistribution(counts.counts) for counts in frontier_counts]
+
+    # prefix[i] combines the frontiers before i and suffix[i] those from i onwards
+    prefix = [[1]]
+    for dist in dists:
+        prefix.append(convolve(prefix[-1], dist))
+    suffix = [[1]] * (len(dists) + 1)
+    for i in reversed(range(len(dists))):
+        suffix[i] = convolve(dists[i], suffix[i + 1])
+    total = prefix[-1]
+
+    # ways of placing the bombs left over by the frontiers in the interior
+    weights = [
+        comb(n_interior, remaining_bombs - n_bombs) if 0 <= remaining_bombs - n_bombs <= n_interior else 0
+        for n_bombs in range(len(total))
+    ]
+    z = sum(count * weight for count, weight in zip(total, weights))
+    if z == 0:
+        weights = [1] * len(total)
+        z = sum(total)
+    if z == 0:
+        return [[] for _ in frontier_counts], 0.0
+
+    probabilities = []
+    for i, counts in enumerate(frontier_counts):
+        others = convolve(prefix[i], suffix[i + 1])
+        n_vars = len(next(iter(counts.tallies.values()), []))
+        weighted = [0] * n_vars
+        for n_bombs, tallies in counts.tallies.items():
+            ways = sum(count * weights[n_bombs + t] for t, count in enumerate(others))
+            if ways:
+                for var, tally in enumerate(tallies):
+                    weighted[var] += tally * ways
+        probabilities.append([w / z for w in weighted])
+
+    interior = 0.0
+    if n_interior:
+        interior_bombs = sum(
+            count * weight * (remaining_bombs - n_bombs)
+            for n_bombs, (count, weight) in enumerate(zip(total, weights))
+        )
+        interior = min(max(interior_bombs / (z * n_interior), 0.0), 1.0)
+    return probabilities, interior
@@ -0,0 +1,147 @@
+'''
+Logs the moves of games and plays them again against the simulator. A log is a JSON lines file
+which games are appended to as they are played, one record per line:
+
+    {"start": 0, "width": 30, "height": 16, "bombs": 99, "state": null}
+    {"move": "open", "squares": [247], "t": 0.001}
+    {"move": "flag", "squares": [215], "t": 0.012}
+    {"move": "guess", "squares": [33], "t": 0.2, "p": 0.18, "probabilities": [[33, 0.18], ...], "interior": 0.2}
+    {"move": "open", "squares": [33], "t": 0.2}
+    {"end": false, "mines": [3, 17, ...], "t": 1.5}
+
+Squares are row-major indices. The mines are only known at the end of a game, the site placing
+them on the first click. A replay plays the recorded board with the current solver and reports
+the first move which differs from the log, so a change in the solver can be bisected over a log
+of lost games without a browser.
+
+    python -m game.replay games.jsonl [--losses]
+'''
+import argparse
+import json
+from timeit import default_timer as timer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from game.backend import GameWon
+from game.simulator import SimulatedBackend
+
+
+class MoveLog:
+    def __init__(self, path: Optional[str]=None) -> None:
+        '''
+        Appends to the file at path, or only keeps the records in memory without one.
+        '''
+        self.records: List[Dict[str, Any]] = []
+        self._file = open(path, 'a') if path else None
+        self._games = 0
+        self._start = timer()
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            self.records.append(record)
+            return
+        # written straight away so that a crash loses no more than the last move
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+
+    def startgame(self, width: int, height: int, bombs: int, state: Optional[str]=None) -> None:
+        self._start = timer()
+        self._write({'start': self._games, 'width': width, 'height': height, 'bombs': bombs, 'state': state})
+        self._games += 1
+
+    def move(self, move: str, squares: Iterable[int], **extra) -> None:
+        record = {'move': move, 'squares': sorted(squares), 't': round(timer() - self._start, 4)}
+        record.update(extra)
+        self._write(record)
+
+    def endgame(self, won: bool, mines: List[int]) -> None:
+        self._write({'end': won, 'mines': sorted(mines), 't': round(timer() - self._start, 4)})
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+def readgames(path: str) -> List[Dict[str, Any]]:
+    '''
+    Returns the games of a log as their start record with the moves and end record added. Games
+    cut short, e.g. by a crash, have no end.
+    '''
+    games = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'start' in record:
+                games.append(dict(record, moves=[], end=None))
+            elif 'move' in record:
+                games[-1]['moves'].append(record)
+            else:
+                games[-1]['end'] = record
+    return games
+
+
+def _moves(records: List[Dict[str, Any]]) -> List[Tuple[str, Tuple[int]]]:
+    return [(record['move'], tuple(record['squares'])) for record in records if 'move' in record]
+
+
+def replay(recorded: Dict[str, Any], **game_kwargs) -> Dict[str, Any]:
+    '''
+    Plays a logged game again on a simulated board with the same mines. Returns whether it was won,
+    the number of moves made and the index of the first move which differs from the log, None if
+    every move matched. The keyword arguments are passed on to Game, e.g. engine.
+    '''
+    from game.game_new import Game
+
+    width, height = recorded['width'], recorded['height']
+    mines = recorded['end']['mines']
+    backend = SimulatedBackend(width, height, len(mines))
+    if recorded['state']:
+        backend.loadstate(recorded['state'])
+    else:
+        backend.board.placemines(mines)
+    log = MoveLog()
+    game = Game('', width, height, len(mines), backend=backend, snapshot=True, visualize=False, log=log, **game_kwargs)
+    won = False
+    tt = timer()
+    try:
+        game.start()
+        game.attemptsolve()
+    except GameWon:
+        won = True
+    tt = timer() - tt
+
+    moves = _moves(log.records)
+    expected = _moves(recorded['moves'])
+    divergence = next((i for i, (a, b) in enumerate(zip(moves, expected)) if a != b), None)
+    if divergence is None and len(moves) != len(expected):
+        divergence = min(len(moves), len(expected))
+    return {'won': won, 'moves': len(moves), 'divergence': divergence, 'time': tt}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log')
+    parser.add_argument('--losses', action='store_true', help='only replay the games which were lost')
+    parser.add_argument('--engine', choices=('dlx', 'bits', 'csp'), default='csp')
+    args = parser.parse_args()
+
+    changed = 0
+    games = [game for game in readgames(args.log) if game['end'] is not None]
+    if args.losses:
+        games = [game for game in games if not game['end']['end']]
+    for recorded in games:
+        result = replay(recorded, engine=args.engine)
+        if result['divergence'] is not None:
+            changed += 1
+        print(
+            'Game', recorded['start'],
+            'won' if recorded['end']['end'] else 'lost', '->', 'won' if result['won'] else 'lost',
+            'moves', result['moves'],
+            'diverges at', result['divergence'],
+            '%.3fs' % result['time']
+        )
+    print(len(games), 'games replayed,', changed, 'played differently')
+
+
+if __name__ == '__main__':
+    main()
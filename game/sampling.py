@@ -0,0 +1,109 @@
+'''
+Estimates the bomb counts of a frontier which is too large to count exactly. Each sample is a
+single random path down the search tree of csp.py: at every branch one of the values which
+propagation does not rule out is picked at random, and the path is weighted by the product of the
+number of choices it had. Summing the weights of the paths ending in an assignment is an unbiased
+estimate of the number of assignments (Knuth's estimator), so the weighted counts can stand in for
+the exact ones, which the probabilities only depend on up to a constant factor.
+'''
+import random
+from math import sqrt
+from time import perf_counter
+from typing import List, Optional, Tuple
+from game import csp
+from game.csp import MineCounts
+
+
+N_BATCHES = 16
+
+
+def samplecounts(
+    n_vars: int,
+    constraints: List[csp.Constraint],
+    n_samples: int=1024,
+    budget: Optional[csp.Budget]=None
+) -> MineCounts:
+    '''
+    Estimates the counts from random paths through the search. The paths are seeded from the
+    constraints so that estimates are reproducible. The standard error of the bomb probabilities is
+    computed from batch means over the samples. Every step down a path is spent from the budget if
+    one is given, and sampling stops early once it runs out and some path has found an assignment,
+    the fewer samples showing in a larger standard error.
+    '''
+    rng = random.Random(hash(tuple(constraints)))
+    counts = MineCounts({}, {})
+    batch_size = max(n_samples // N_BATCHES, 1)
+    batch_weights: List[int] = []
+    batch_tallies: List[List[int]] = []  # weight of bombs on each variable per batch of samples
+
+    sampled = 0
+    for sample in range(n_samples):
+        # a path takes many steps, so the clock is checked before each rather than every so often
+        if counts.counts and budget is not None and budget.deadline is not None and perf_counter() > budget.deadline:
+            break
+        try:
+            # the budget only applies once there is an estimate to return
+            assignment, weight = _samplepath(constraints, rng, budget if counts.counts else None)
+        except csp.BudgetExceeded:
+            break
+        sampled += 1
+        if sample % batch_size == 0:
+            batch_weights.append(0)
+            batch_tallies.append([0] * n_vars)
+        if assignment is None:
+            continue
+
+        mines = assignment[0]
+        n = mines.bit_count()
+        if n not in counts.counts:
+            counts.counts[n] = 0
+            counts.tallies[n] = [0] * n_vars
+        counts.counts[n] += weight
+        batch_weights[-1] += weight
+        for var in range(n_vars):
+            if mines >> var & 1:
+                counts.tallies[n][var] += weight
+                batch_tallies[-1][var] += weight
+
+    # the spread of the batch estimates gives the error of the overall estimate
+    batches = [(w, tallies) for w, tallies in zip(batch_weights, batch_tallies) if w]
+    stderr = 1.0
+    if len(batches) > 1:
+        stderr = 0.0
+        for var in range(n_vars):
+            means = [tallies[var] / w for w, tallies in batches]
+            mean = sum(means) / len(means)
+            variance = sum((m - mean) ** 2 for m in means) / (len(means) - 1)
+            stderr = max(stderr, sqrt(variance / len(means)))
+    # never claim certainty from samples alone
+    return MineCounts(counts.counts, counts.tallies, max(stderr, 1 / max(sampled, 1)))
+
+
+def _samplepath(
+    constraints: List[csp.Constraint],
+    rng: random.Random,
+    budget: Optional[csp.Budget]
+) -> Tuple[Optional[Tuple[int, int]], int]:
+    '''
+    Walks one random path down the search and returns the assignment it ends in, None if it runs
+    into a contradiction, along with its weight.
+    '''
+    weight = 1
+    assignment = csp.propagate(constraints, 0, 0)
+    while assignment is not None:
+        if budget is not None:
+            budget.spend()
+        mines, safe = assignment
+        var = csp._selectvar(constraints, mines, safe)
+        if not var:
+            break
+        branches = [
+            branch for branch in (
+                csp.propagate(constraints, mines | var, safe),
+                csp.propagate(constraints, mines, safe | var)
+            )
+            if branch is not None
+        ]
+        weight *= len(branches)
+        assignment = rng.choice(branches) if branches else None
+    return assignment, weight
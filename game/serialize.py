@@ -0,0 +1,177 @@
+'''
+Reads and writes boards in two forms.
+
+Game states are the base64 encoded JSON exported and imported by minesweeperonline.com. Their
+'gridObj' is padded by one square on each side and holds every square's count of adjacent mines,
+mines being negative (adjacent mines - 10). Squares which have been touched are lists of
+[value, opened, flagged, marked] instead. A game state describes the whole board, mines included.
+
+Positions are what the solver sees of a board, packed for storing in bulk: a width and height
+byte, then 2 bits per square for blank, flag, open or bomb, four squares to a byte, then a nibble
+per open square for its clue, two to a byte. An expert position takes at most 362 bytes.
+'''
+import base64
+import json
+from typing import Dict, List, Tuple
+
+
+# gameTypeId of the site's difficulties by (width, height, mines), anything else is a custom game
+GAME_TYPES = {(9, 9, 10): 1, (16, 16, 40): 2, (30, 16, 99): 3}
+CUSTOM_GAME_TYPE = 4
+
+# what a square shows in a position
+BLANK = 0
+FLAG = 1
+OPEN = 2
+BOMB = 3  # a revealed or exploded bomb, positions do not tell them apart
+
+KIND_TO_CLASS = {BLANK: 'square blank', FLAG: 'square bombflagged', BOMB: 'square bombrevealed'}
+CLASS_TO_KIND = {
+    'blank': BLANK, 'bombflagged': FLAG, 'bombmisflagged': FLAG, 'bombrevealed': BOMB, 'bombdeath': BOMB
+}
+
+
+def decodestate(state: str) -> Dict:
+    return json.loads(base64.b64decode(state))
+
+
+def encodestate(obj: Dict) -> str:
+    # the site writes its JSON without any whitespace
+    return base64.b64encode(json.dumps(obj, separators=(',', ':')).encode()).decode()
+
+
+def cells(obj: Dict) -> List[Tuple[int, bool, bool]]:
+    '''
+    Returns the (value, opened, flagged) of every square of a decoded game state, row by row and
+    without the padding.
+    '''
+    ret = []
+    for row in obj['gridObj'][1:obj['numRows'] + 1]:
+        for cell in row[1:obj['numCols'] + 1]:
+            value, is_opened, is_flagged = (cell, 0, 0) if isinstance(cell, int) else cell[:3]
+            ret.append((value, bool(is_opened), bool(is_flagged)))
+    return ret
+
+
+def createstate(
+    width: int,
+    height: int,
+    mines: List[int],
+    opened: List[bool],
+    flagged: List[bool],
+    time: int=1
+) -> Dict:
+    '''
+    Returns the game state of a board given the indices of its mines and which squares are opened
+    and flagged, ready for encodestate.
+    '''
+    is_mine = set(mines)
+    grid = []
+    for y in range(-1, height + 1):
+        row = []
+        for x in range(-1, width + 1):
+            value = sum(
+                (y + dy) * width + x + dx in is_mine
+                for dy in range(-1, 2) for dx in range(-1, 2)
+                if (dx or dy) and 0 <= x + dx < width and 0 <= y + dy < height
+            )
+            index = y * width + x
+            if 0 <= x < width and 0 <= y < height:
+                if index in is_mine:
+                    value -= 10
+                if opened[index] or flagged[index]:
+                    value = [value, int(opened[index]), int(flagged[index]), 0]
+            row.append(value)
+        grid.append(row)
+    return {
+        'version': 1,
+        'gameTypeId': GAME_TYPES.get((width, height, len(is_mine)), CUSTOM_GAME_TYPE),
+        'numRows': height,
+        'numCols': width,
+        'numMines': len(is_mine),
+        'gridObj': grid,
+        'time': time,
+    }
+
+
+def encodeposition(width: int, height: int, kinds: List[int], clues: List[int]) -> bytes:
+    '''
+    Packs the kind of every square, and the clue of every open square, into a position. Clues of
+    squares which are not open are ignored.
+    '''
+    ret = bytearray([width, height])
+    packed = bytearray((len(kinds) + 3) // 4)
+    for index, kind in enumerate(kinds):
+        packed[index >> 2] |= kind << ((index & 3) << 1)
+    ret += packed
+    open_clues = [clue for kind, clue in zip(kinds, clues) if kind == OPEN]
+    nibbles = bytearray((len(open_clues) + 1) // 2)
+    for i, clue in enumerate(open_clues):
+        nibbles[i >> 1] |= clue << ((i & 1) << 2)
+    ret += nibbles
+    return bytes(ret)
+
+
+def decodeposition(data: bytes) -> Tuple[int, int, List[int], List[int]]:
+    '''
+    Returns the width, height, kinds and clues of a position, the clue of a square which is not
+    open being -1.
+    '''
+    width, height = data[0], data[1]
+    n_squares = width * height
+    offset = 2 + (n_squares + 3) // 4
+    kinds = [data[2 + (index >> 2)] >> ((index & 3) << 1) & 3 for index in range(n_squares)]
+    clues = []
+    i = 0
+    for kind in kinds:
+        if kind == OPEN:
+            clues.append(data[offset + (i >> 1)] >> ((i & 1) << 2) & 0xf)
+            i += 1
+        else:
+            clues.append(-1)
+    return width, height, kinds, clues
+
+
+def positionclasses(data: bytes) -> Tuple[int, int, List[str]]:
+    '''
+    Returns the width, height and the class attribute every square of a position would have on the
+    page.
+    '''
+    width, height, kinds, clues = decodeposition(data)
+    return width, height, [
+        f'square open{clue}' if kind == OPEN else KIND_TO_CLASS[kind]
+        for kind, clue in zip(kinds, clues)
+    ]
+
+
+def classposition(width: int, height: int, classnames: List[str]) -> bytes:
+    '''
+    Returns the position of a board from the class attributes of its squares.
+    '''
+    kinds = []
+    clues = []
+    for classname in classnames:
+        square_type = classname.split(' ')[1]
+        if square_type in CLASS_TO_KIND:
+            kinds.append(CLASS_TO_KIND[square_type])
+            clues.append(-1)
+        else:
+            kinds.append(OPEN)
+            clues.append(int(square_type[4:]))
+    return encodeposition(width, height, kinds, clues)
+
+
+def stateposition(state: str) -> bytes:
+    '''
+    Returns the position a player sees of a game state.
+    '''
+    obj = decodestate(state)
+    kinds = []
+    clues = []
+    for value, is_opened, is_flagged in cells(obj):
+        if is_opened:
+            kinds.append(BOMB if value < 0 else OPEN)
+        else:
+            kinds.append(FLAG if is_flagged else BLANK)
+        clues.append(value if is_opened and value >= 0 else -1)
+    return encodeposition(obj['numCols'], obj['numRows'], kinds, clues)
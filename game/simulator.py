@@ -0,0 +1,199 @@
+import random
+from typing import List, Optional, Set, Tuple
+from game import serialize
+from game.backend import Backend, BoardView, GameWon
+
+
+class Board:
+    '''
+    A pure-Python Minesweeper board. Like minesweeperonline.com, mines are only placed on the first
+    click so that it is always safe. Squares are addressed by their row-major index.
+    '''
+    def __init__(self, width: int, height: int, bombs: int, seed: Optional[int]=None) -> None:
+        self.width = width
+        self.height = height
+        self.bombs = bombs
+        self._random = random.Random(seed)
+        self.adj: List[Tuple[int]] = [self._getadj(i) for i in range(width * height)]
+        self.reset()
+
+    def _getadj(self, index: int) -> Tuple[int]:
+        x, y = index % self.width, index // self.width
+        adj = []
+        for dy in range(-1, 2):
+            for dx in range(-1, 2):
+                if (dy != 0 or dx != 0) and 0 <= x + dx < self.width and 0 <= y + dy < self.height:
+                    adj.append((y + dy) * self.width + x + dx)
+        return tuple(adj)
+
+    @property
+    def over(self) -> bool:
+        return self.exploded is not None or self.won
+
+    def reset(self) -> None:
+        '''
+        Clears the board. The next layout is drawn from the board's random generator on the first
+        click, so a seeded board produces the same sequence of games.
+        '''
+        n = self.width * self.height
+        self.mines: Optional[Set[int]] = None
+        self.counts = [0] * n
+        self.opened = [False] * n
+        self.flagged = [False] * n
+        self.n_opened = 0
+        self.exploded: Optional[int] = None
+        self.won = False
+
+    def placemines(self, mines) -> None:
+        self.mines = set(mines)
+        self.counts = [sum(adj in self.mines for adj in self.adj[i]) for i in range(len(self.adj))]
+
+    def loadstate(self, state: str) -> None:
+        '''
+        Loads a base64 encoded game exported from minesweeperonline.com, see serialize.py.
+        '''
+        obj = serialize.decodestate(state)
+        if obj['numRows'] != self.height or obj['numCols'] != self.width:
+            raise ValueError('Game state does not match the board size!')
+        self.reset()
+        squares = serialize.cells(obj)
+        mines = [index for index, (value, _, _) in enumerate(squares) if value < 0]
+        self.bombs = len(mines)
+        self.placemines(mines)
+        for index, (_, is_opened, is_flagged) in enumerate(squares):
+            self.opened[index] = is_opened
+            self.flagged[index] = is_flagged
+        self.n_opened = sum(self.opened)
+
+    def exportstate(self) -> str:
+        '''
+        Returns the board as a game state which minesweeperonline.com can import. A board without
+        mines yet has none in its state either.
+        '''
+        return serialize.encodestate(serialize.createstate(
+            self.width, self.height, sorted(self.mines or ()), self.opened, self.flagged
+        ))
+
+    def open(self, index: int) -> None:
+        if self.mines is None:
+            candidates = [i for i in range(len(self.adj)) if i != index]
+            self.placemines(self._random.sample(candidates, self.bombs))
+        if self.over or self.opened[index] or self.flagged[index]:
+            return
+        if index in self.mines:
+            self.exploded = index
+            return
+
+        # flood fill from squares without adjacent mines
+        to_open = [index]
+        while to_open:
+            current = to_open.pop()
+            if self.opened[current] or self.flagged[current]:
+                continue
+            self.opened[current] = True
+            self.n_opened += 1
+            if self.counts[current] == 0:
+                to_open.extend(adj for adj in self.adj[current] if not self.opened[adj])
+        self.won = self.n_opened == len(self.adj) - self.bombs
+
+    def toggleflag(self, index: int) -> None:
+        if not self.over and not self.opened[index]:
+            self.flagged[index] = not self.flagged[index]
+
+    def chord(self, index: int) -> None:
+        if self.over or not self.opened[index]:
+            return
+        if sum(self.flagged[adj] for adj in self.adj[index]) == self.counts[index]:
+            for adj in self.adj[index]:
+                if not self.flagged[adj] and not self.opened[adj]:
+                    self.open(adj)
+
+    def classname(self, index: int) -> str:
+        if self.opened[index]:
+            return f'square open{self.counts[index]}'
+        if self.exploded is not None:
+            if index == self.exploded:
+                return 'square bombdeath'
+            if index in self.mines and not self.flagged[index]:
+                return 'square bombrevealed'
+            if self.flagged[index] and index not in self.mines:
+                return 'square bombmisflagged'
+        if self.flagged[index]:
+            return 'square bombflagged'
+        return 'square blank'
+
+
+class SimulatedBackend(Backend):
+    '''
+    Runs a game against an in-process Board instead of a browser. Elements are square indices.
+    '''
+    def __init__(self, width: int, height: int, bombs: int, seed: Optional[int]=None) -> None:
+        self.board = Board(width, height, bombs, seed)
+
+    def _checkwon(self) -> None:
+        if self.board.won:
+            raise GameWon()
+
+    def squares(self) -> List[int]:
+        return list(range(self.board.width * self.board.height))
+
+    def getclass(self, element: int) -> str:
+        return self.board.classname(element)
+
+    def snapshot(self) -> List[str]:
+        return [self.board.classname(i) for i in range(self.board.width * self.board.height)]
+
+    def click(self, element: int) -> None:
+        self.board.open(element)
+        self._checkwon()
+
+    def flag(self, element: int) -> None:
+        self.board.toggleflag(element)
+
+    def chord(self, element: int) -> None:
+        self.board.chord(element)
+        self._checkwon()
+
+    def execute_script(self, script: str) -> None:
+        return None
+
+    def loadstate(self, state: str) -> None:
+        self.board.loadstate(state)
+
+    def exportstate(self) -> str:
+        return self.board.exportstate()
+
+    def restart(self) -> None:
+        self.board.reset()
+
+    def savescreenshot(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PositionView(BoardView):
+    '''
+    Shows a position, see serialize.py, so that a Grid can be built from it. There are no mines
+    behind the position, so it can only be looked at and not played.
+    '''
+    def __init__(self, position: bytes) -> None:
+        self.width, self.height, self._classnames = serialize.positionclasses(position)
+
+    @classmethod
+    def fromstate(cls, state: str) -> 'PositionView':
+        '''
+        Shows what a player sees of a game state. Load the state into a SimulatedBackend instead to
+        play it.
+        '''
+        return cls(serialize.stateposition(state))
+
+    def squares(self) -> List[int]:
+        return list(range(self.width * self.height))
+
+    def getclass(self, element: int) -> str:
+        return self._classnames[element]
+
+    def snapshot(self) -> List[str]:
+        return list(self._classnames)
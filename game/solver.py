@@ -0,0 +1,293 @@
+'''
+Solves frontiers described without any reference to squares or backends, so that they can be sent
+to other processes. Variable i of a FrontierProblem is the i-th blank of the frontier and every
+constraint is a (bitset of variables, bombs among them) pair as in csp.py.
+
+Problems are first split into independent components, and large components are cut at an
+articulation variable: a blank whose removal disconnects the clues. Each value of the cut variable
+leaves independent halves which are counted separately and combined by convolving their counts, so
+the cost is the sum of the halves' rather than their product. Searches can be given a budget, past
+which the counts are estimated with sampling.py.
+'''
+import itertools
+from math import factorial, prod
+from typing import List, NamedTuple, Optional, Tuple
+from game import bitcover, csp
+from game.board import indices
+from game.csp import MineCounts
+from game.exactcover import countcover, createnodematrix
+from game.probability import convolve, todistribution
+from game.sampling import samplecounts
+
+
+# components with more variables than this are cut if they have an articulation variable
+CUT_SIZE = 16
+
+
+class FrontierProblem(NamedTuple):
+    n_vars: int
+    constraints: Tuple[csp.Constraint, ...]
+
+
+def creatematrix(problem: FrontierProblem) -> Tuple[List[Tuple[int]], List[int], int, int, int]:
+    '''
+    Creates the exact cover matrix of the problem. Every constraint gets one column per bomb it
+    needs and every variable one row per way of picking a column from each of its constraints. Each
+    variable also gets a secondary column so that it holds at most one bomb. Returns the matrix,
+    the variable of every row and the number of rows, primary columns and secondary columns.
+    '''
+    col_ranges = []
+    i = 0
+    for _, value in problem.constraints:
+        col_ranges.append(range(i, i + value))
+        i += value
+
+    mat = []
+    row_vars = []
+    for var in range(problem.n_vars):
+        ranges = [col_ranges[c] for c, (mask, _) in enumerate(problem.constraints) if mask >> var & 1]
+        for index_set in itertools.product(*ranges):
+            mat.append(index_set + (i + var,))
+            row_vars.append(var)
+    return mat, row_vars, len(mat), i, problem.n_vars
+
+
+def createbitmatrix(problem: FrontierProblem) -> Tuple[bitcover.BitMatrix, List[int]]:
+    '''
+    Creates the matrix of creatematrix as a bitcover.BitMatrix straight from the constraint
+    bitsets, without going through a list of rows. Returns the matrix and the variable of every
+    row.
+    '''
+    var_ranges: List[List[range]] = [[] for _ in range(problem.n_vars)]
+    n_cols = 0
+    for mask, value in problem.constraints:
+        for var in indices(mask):
+            var_ranges[var].append(range(n_cols, n_cols + value))
+        n_cols += value
+
+    # a variable's rows go through its picks of columns with the last constraint changing fastest,
+    # so the rows covering a column are runs of the same length repeating at a regular interval
+    cols = [0] * (n_cols + problem.n_vars)
+    row_vars: List[int] = []
+    for var, ranges in enumerate(var_ranges):
+        n_rows = prod(map(len, ranges))
+        if not n_rows:
+            continue
+        var_rows = (1 << n_rows) - 1
+        cols[n_cols + var] = var_rows << len(row_vars)
+        run = n_rows
+        for col_range in ranges:
+            period = run
+            run //= len(col_range)
+            # the first run of every period, moved along by a run for each column
+            runs = ((1 << run) - 1) * (var_rows // ((1 << period) - 1)) << len(row_vars)
+            for col in col_range:
+                cols[col] |= runs
+                runs <<= run
+        row_vars += [var] * n_rows
+
+    # a row covers, and conflicts with the rows covering, one column of each of its constraints and
+    # its secondary column
+    rows: List[int] = []
+    conflicts: List[int] = []
+    for var, ranges in enumerate(var_ranges):
+        var_rows = [1 << (n_cols + var)]
+        var_conflicts = [cols[n_cols + var]]
+        for col_range in ranges:
+            var_rows = [row | 1 << col for row in var_rows for col in col_range]
+            var_conflicts = [conflict | cols[col] for conflict in var_conflicts for col in col_range]
+        rows += var_rows
+        conflicts += var_conflicts
+    return bitcover.BitMatrix(rows, cols, conflicts, n_cols), row_vars
+
+
+def components(constraints: Tuple[csp.Constraint, ...], variables: int) -> List[int]:
+    '''
+    Returns the bitsets of the given variables which are linked by the constraints, ordered by
+    their lowest variable. Variables in no constraint are components of their own.
+    '''
+    comps: List[int] = []
+    for mask, _ in constraints:
+        mask &= variables
+        if not mask:
+            continue
+        merged = mask
+        rest = []
+        for comp in comps:
+            if comp & mask:
+                merged |= comp
+            else:
+                rest.append(comp)
+        rest.append(merged)
+        comps = rest
+    linked = 0
+    for comp in comps:
+        linked |= comp
+    comps.extend(1 << var for var in indices(variables & ~linked))
+    return sorted(comps, key=lambda comp: comp & -comp)
+
+
+def subproblem(problem: FrontierProblem, variables: int) -> FrontierProblem:
+    '''
+    Returns the constraints on the given variables, renumbered in ascending order.
+    '''
+    order = list(indices(variables))
+    constraints = []
+    for mask, value in problem.constraints:
+        if mask & variables:
+            constraints.append((sum(1 << i for i, var in enumerate(order) if mask >> var & 1), value))
+    return FrontierProblem(len(order), tuple(constraints))
+
+
+def condition(problem: FrontierProblem, var: int, value: int) -> Optional[FrontierProblem]:
+    '''
+    Returns the problem with the variable fixed to the value and left out of every constraint, or
+    None if a constraint can no longer be satisfied.
+    '''
+    bit = 1 << var
+    constraints = []
+    for mask, clue in problem.constraints:
+        if mask & bit:
+            mask ^= bit
+            clue -= value
+            if clue < 0 or clue > mask.bit_count():
+                return None
+        if mask:
+            constraints.append((mask, clue))
+    return FrontierProblem(problem.n_vars, tuple(constraints))
+
+
+def articulation(problem: FrontierProblem) -> Optional[int]:
+    '''
+    Returns the variable whose removal splits the problem into the most even components, or None if
+    no single variable disconnects it.
+    '''
+    everything = (1 << problem.n_vars) - 1
+    best = None
+    best_size = problem.n_vars
+    for var in range(problem.n_vars):
+        comps = components(problem.constraints, everything & ~(1 << var))
+        if len(comps) > 1:
+            size = max(comp.bit_count() for comp in comps)
+            if size < best_size:
+                best, best_size = var, size
+    return best
+
+
+def combine(parts: List[Tuple[int, MineCounts]], n_vars: int) -> MineCounts:
+    '''
+    Combines the counts of independent parts of a problem, given with the bitset of the variables
+    each part is numbered over.
+    '''
+    dists = [todistribution(part.counts) for _, part in parts]
+    prefix = [[1]]
+    for dist in dists:
+        prefix.append(convolve(prefix[-1], dist))
+    suffix = [[1]] * (len(dists) + 1)
+    for i in reversed(range(len(dists))):
+        suffix[i] = convolve(dists[i], suffix[i + 1])
+
+    counts = MineCounts({}, {})
+    for n_bombs, count in enumerate(prefix[-1]):
+        if count:
+            counts.counts[n_bombs] = count
+            counts.tallies[n_bombs] = [0] * n_vars
+    for i, (variables, part) in enumerate(parts):
+        others = convolve(prefix[i], suffix[i + 1])
+        order = list(indices(variables))
+        for n_bombs, tallies in part.tallies.items():
+            for n_others, ways in enumerate(others):
+                if ways and n_bombs + n_others in counts.tallies:
+                    target = counts.tallies[n_bombs + n_others]
+                    for var, tally in zip(order, tallies):
+                        target[var] += tally * ways
+    return counts
+
+
+def countmines(
+    problem: FrontierProblem,
+    engine: str='csp',
+    time_limit: Optional[float]=None,
+    node_limit: Optional[int]=None,
+    budget: Optional[csp.Budget]=None
+) -> MineCounts:
+    '''
+    Counts the bomb arrangements of the problem with the given engine, see Game. Should the search
+    take longer than time_limit seconds or visit more than node_limit nodes, the counts are
+    estimated by sampling instead, within the same limits again, which is marked by their stderr.
+    A budget may be given in place of the limits, its spent nodes then tell how much searching was
+    done.
+    '''
+    if budget is None and (time_limit is not None or node_limit is not None):
+        budget = csp.Budget(time_limit, node_limit)
+    if budget is None:
+        return _countmines(problem, engine, None)
+    try:
+        return _countmines(problem, engine, budget)
+    except csp.BudgetExceeded:
+        # the sampling gets as much again as the search had
+        return samplecounts(problem.n_vars, list(problem.constraints), budget=csp.Budget(budget.seconds, budget.nodes))
+
+
+def _countmines(problem: FrontierProblem, engine: str, budget: Optional[csp.Budget]) -> MineCounts:
+    everything = (1 << problem.n_vars) - 1
+    comps = components(problem.constraints, everything)
+    if not comps:
+        return MineCounts({0: 1}, {0: []})
+    if len(comps) == 1:
+        return _countcomponent(problem, engine, budget)
+    return combine(
+        [(comp, _countcomponent(subproblem(problem, comp), engine, budget)) for comp in comps],
+        problem.n_vars
+    )
+
+
+def _countcomponent(problem: FrontierProblem, engine: str, budget: Optional[csp.Budget]) -> MineCounts:
+    if not problem.constraints:
+        # a lone variable which may or may not be a bomb
+        return MineCounts({0: 1, 1: 1}, {0: [0] * problem.n_vars, 1: [1] * problem.n_vars})
+    var = articulation(problem) if problem.n_vars > CUT_SIZE else None
+    if var is None:
+        return _countdirect(problem, engine, budget)
+
+    counts = MineCounts({}, {})
+    rest = ((1 << problem.n_vars) - 1) & ~(1 << var)
+    for value in (0, 1):
+        conditioned = condition(problem, var, value)
+        if conditioned is None:
+            continue
+        sub_counts = _countmines(subproblem(conditioned, rest), engine, budget)
+        for n_bombs, count in sub_counts.counts.items():
+            tallies = sub_counts.tallies[n_bombs][:var] + [count * value] + sub_counts.tallies[n_bombs][var:]
+            if n_bombs + value in counts.counts:
+                counts.counts[n_bombs + value] += count
+                counts.tallies[n_bombs + value] = [
+                    a + b for a, b in zip(counts.tallies[n_bombs + value], tallies)
+                ]
+            else:
+                counts.counts[n_bombs + value] = count
+                counts.tallies[n_bombs + value] = tallies
+    return counts
+
+
+def _countdirect(problem: FrontierProblem, engine: str, budget: Optional[csp.Budget]=None) -> MineCounts:
+    if engine == 'csp':
+        return csp.countassignments(problem.n_vars, list(problem.constraints), budget)
+
+    if engine == 'bits':
+        matrix, row_vars = createbitmatrix(problem)
+        cover_counts = bitcover.countcover(matrix, budget)
+    else:
+        mat, row_vars, n_rows, n_cols, n_secondary = creatematrix(problem)
+        cover_counts = countcover(createnodematrix(mat, n_rows, n_cols, n_secondary), n_rows, budget)
+
+    # every arrangement is counted once per ordering of the bombs within each clue's columns
+    counts = MineCounts({}, {})
+    orderings = prod(factorial(value) for _, value in problem.constraints)
+    for n_bombs, count in cover_counts.counts.items():
+        tallies = [0] * problem.n_vars
+        for var, tally in zip(row_vars, cover_counts.tallies[n_bombs]):
+            tallies[var] += tally
+        counts.counts[n_bombs] = count // orderings
+        counts.tallies[n_bombs] = [tally // orderings for tally in tallies]
+    return counts
@@ -1,6 +1,8 @@
-from typing import Tuple
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.remote.webdriver import WebDriver, WebElement
+from typing import TYPE_CHECKING, Optional, Tuple
+from game import board
+
+if TYPE_CHECKING:
+    from game.grid_new import Grid
 
 
 class Square:
@@ -18,72 +20,115 @@ class Square:
         'blank': BLANK,
         'bombdeath': BOMBDEATH,
         'bombrevealed': BOMBREVEALED,
-        'bombflagged': FLAG
+        'bombflagged': FLAG,
+        'bombmisflagged': FLAG
+    }
+
+    TYPE_TO_KIND = {
+        'blank': board.BLANK,
+        'bombdeath': board.BOMBDEATH,
+        'bombrevealed': board.BOMBREVEALED,
+        'bombflagged': board.FLAG,
+        'bombmisflagged': board.FLAG  # a flag without a mine, shown once the game is lost
+    }
+
+    KIND_TO_CHAR = {
+        board.BLANK: BLANK,
+        board.BOMBDEATH: BOMBDEATH,
+        board.BOMBREVEALED: BOMBREVEALED,
+        board.FLAG: FLAG
     }
 
-    def __init__(self, x: int, y: int, element: WebElement, webdriver: WebDriver) -> None:
-        self.x = x
-        self.y = y
-        self._element = element
-        self._webdriver = webdriver
-        self.is_revealed = False
-        self.char = None
-        self.clue = None
-        self.adj: Tuple[Square] = ()
-        self.refresh()
+    # a square is a view onto its index in the grid, it holds no state of its own. Its position,
+    # neighbours, element and backend all come from the grid.
+    __slots__ = ('index', '_grid')
+
+    def __init__(self, grid: 'Grid', index: int, classname: Optional[str]=None) -> None:
+        self.index = index
+        self._grid = grid
+        self.refresh(classname)
+
+    def __hash__(self) -> int:
+        # hash by position so that sets of squares iterate in the same order from run to run
+        return hash((self.x, self.y))
 
     def __repr__(self) -> str:
         return f'{self.x} {self.y} {self.char}'
     
     def __str__(self) -> str:
         return self.char
+
+    @property
+    def x(self) -> int:
+        return self.index % self._grid.width
+
+    @property
+    def y(self) -> int:
+        return self.index // self._grid.width
+
+    @property
+    def adj(self) -> Tuple['Square']:
+        squares = self._grid._squares
+        return tuple([squares[i] for i in self._grid.board.neighbours[self.index]])
+
+    @property
+    def char(self) -> str:
+        state = self._grid.board
+        kind = state.kinds[self.index]
+        if kind == board.OPEN:
+            return str(state.clues[self.index])
+        return Square.KIND_TO_CHAR[kind]
+
+    @property
+    def clue(self) -> Optional[int]:
+        clue = self._grid.board.clues[self.index]
+        return clue if clue >= 0 else None
+
+    @property
+    def is_revealed(self) -> bool:
+        return bool(self._grid.board.revealed >> self.index & 1)
     
-    def refresh(self) -> bool:
-        square_type = self._element.get_attribute('class').split(' ')[1]
-        if square_type in Square.TYPE_TO_CHAR:
-            new_char = Square.TYPE_TO_CHAR[square_type]
+    def refresh(self, classname: Optional[str]=None) -> bool:
+        '''
+        Updates the square from its class attribute, fetching it from the backend unless given.
+        Returns whether the state has changed.
+        '''
+        state = self._grid.board
+        if classname is None:
+            classname = self._grid._backend.getclass(self._grid._elements[self.index])
+        square_type = classname.split(' ')[1]
+        kinds = state.kinds
+        if square_type in Square.TYPE_TO_KIND:
+            kind = Square.TYPE_TO_KIND[square_type]
+            ret = kinds[self.index] != kind
         else:
-            new_char = square_type[4:]  # this extracts the clue number
-            self.clue = int(new_char)
-        ret = self.char != new_char
-        self.char = new_char
+            kind = board.OPEN
+            clue = int(square_type[4:])  # this extracts the clue number
+            ret = kinds[self.index] != kind or state.clues[self.index] != clue
+            state.setclue(self.index, clue)
+        if kinds[self.index] != kind:
+            state.setkind(self.index, kind)
         return ret
 
     def click(self):
-        action_chain = ActionChains(self._webdriver)
-        action_chain.click(self._element)
-        action_chain.perform()
+        self._grid._backend.click(self._grid._elements[self.index])
     
     def flag(self):
-        self.char = Square.FLAG
-        # self.highlight('red')
-        action_chain = ActionChains(self._webdriver)
-        action_chain.move_to_element(self._element)
-        action_chain.send_keys(' ')
-        action_chain.perform()
+        self._grid.board.setkind(self.index, board.FLAG)
+        self._grid._backend.flag(self._grid._elements[self.index])
     
     def reveal(self):
+        state = self._grid.board
         if not self.is_revealed:
-            self.is_revealed = True
-            if len(list(filter(lambda sq: sq.char == Square.BLANK, self.adj))):
-                action_chain = ActionChains(self._webdriver)
-                action_chain.move_to_element(self._element)
-                action_chain.send_keys(' ')
-                action_chain.perform()
+            state.revealed |= 1 << self.index
+            if state.countblanks(self.index):
+                self._grid._backend.chord(self._grid._elements[self.index])
     
     def decrementclue(self, val=1) -> int:
-        if self.clue is not None:
-            self.clue = self.clue - val if self.clue >= val else 0
-            self.char = str(self.clue)
-            return self.clue
+        clue = self.clue
+        if clue is not None:
+            clue = clue - val if clue >= val else 0
+            self._grid.board.setclue(self.index, clue)
+            return clue
         else:
             raise Exception('Decrementing a non clue square!')
-
-    def highlight(self, color: str):
-        self._webdriver.execute_script(f"document.getElementById('{self.y + 1}_{self.x + 1}').style.backgroundBlendMode = 'screen';")
-        self._webdriver.execute_script(f"document.getElementById('{self.y + 1}_{self.x + 1}').style.backgroundColor = '{color}';")
-    
-    def unhighlight(self):
-        self._webdriver.execute_script(f"document.getElementById('{self.y + 1}_{self.x + 1}').style.backgroundBlendMode = '';")
-        self._webdriver.execute_script(f"document.getElementById('{self.y + 1}_{self.x + 1}').style.backgroundColor = '';")
-
@@ -0,0 +1,69 @@
+'''
+Highlights squares on the game page to show what the solver is doing. Style changes are queued and
+sent to the page together in one script, rather than two scripts per square, and the highlights of
+the whole board are cleared with one more.
+'''
+import json
+from typing import Dict, Iterable, Optional, Tuple
+from game.backend import Backend
+
+
+def stylescript(styles: Iterable[Tuple[str, Optional[str]]]) -> str:
+    '''
+    Returns the script setting the highlight of each (element id, color) pair, a color of None
+    removing it.
+    '''
+    return (
+        f'for (const [id, color] of {json.dumps(list(styles))}) {{'
+        'const style = document.getElementById(id).style;'
+        "style.backgroundBlendMode = color ? 'screen' : '';"
+        "style.backgroundColor = color || '';"
+        '}'
+    )
+
+
+CLEAR_SCRIPT = (
+    "for (const square of document.getElementsByClassName('square')) {"
+    "square.style.backgroundBlendMode = '';"
+    "square.style.backgroundColor = '';"
+    '}'
+)
+
+
+class Visualizer:
+    def __init__(self, backend: Backend) -> None:
+        self._backend = backend
+        self._pending: Dict[str, Optional[str]] = {}  # latest color of every changed element
+
+    @staticmethod
+    def elementid(square) -> str:
+        return f'{square.y + 1}_{square.x + 1}'
+
+    def highlight(self, squares: Iterable, color: str) -> None:
+        '''
+        Highlights the squares straight away, along with any queued changes, so that they are seen
+        before the moves on them are made.
+        '''
+        for square in squares:
+            self._pending[self.elementid(square)] = color
+        self.flush()
+
+    def unhighlight(self, squares: Iterable) -> None:
+        '''
+        Queues the removal of the squares' highlights, which is sent with the next highlight or
+        flush.
+        '''
+        for square in squares:
+            self._pending[self.elementid(square)] = None
+
+    def flush(self) -> None:
+        if self._pending:
+            self._backend.execute_script(stylescript(self._pending.items()))
+            self._pending.clear()
+
+    def clear(self) -> None:
+        '''
+        Removes every highlight on the page in one call.
+        '''
+        self._pending.clear()
+        self._backend.execute_script(CLEAR_SCRIPT)
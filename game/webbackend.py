@@ -0,0 +1,125 @@
+import functools
+import os
+from typing import List, Tuple
+from selenium import webdriver
+from selenium.common.exceptions import UnexpectedAlertPresentException, WebDriverException
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.webelement import WebElement
+from game.backend import Backend, GameWon
+
+
+def _alertguard(method):
+    '''
+    The site announces a win with an alert which makes the next WebDriver call raise. Translate
+    that into GameWon so callers do not depend on Selenium.
+    '''
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except UnexpectedAlertPresentException:
+            raise GameWon()
+    return wrapper
+
+
+class WebDriverBackend(Backend):
+    GAMEURL = 'http://minesweeperonline.com/#'
+    SCREENSHOT_PATH = './screenshots'
+
+    def __init__(self, difficulty: str, url: str=GAMEURL) -> None:
+        '''
+        The url may point at a local copy of the game page, e.g. for a pool of sessions which
+        should not all load the site.
+        '''
+        self._webdriver = webdriver.Chrome()
+        self._webdriver.set_window_size(800, 600)
+        self._webdriver.get(url + difficulty)
+
+    @_alertguard
+    def squares(self):
+        return self._webdriver.find_elements(By.CLASS_NAME, 'square')
+
+    @_alertguard
+    def getclass(self, element: WebElement) -> str:
+        return element.get_attribute('class')
+
+    @_alertguard
+    def snapshot(self):
+        return self._webdriver.execute_script(
+            "return Array.from(document.getElementsByClassName('square'), sq => sq.className);"
+        )
+
+    @_alertguard
+    def click(self, element: WebElement) -> None:
+        action_chain = ActionChains(self._webdriver)
+        action_chain.click(element)
+        action_chain.perform()
+
+    @_alertguard
+    def flag(self, element: WebElement) -> None:
+        self._space(element)
+
+    @_alertguard
+    def chord(self, element: WebElement) -> None:
+        self._space(element)
+
+    @_alertguard
+    def perform(self, moves: List[Tuple[str, WebElement]]) -> None:
+        # one action chain for all of the moves instead of one request each
+        action_chain = ActionChains(self._webdriver)
+        for move, element in moves:
+            if move == 'click':
+                action_chain.click(element)
+            else:
+                action_chain.move_to_element(element)
+                action_chain.send_keys(' ')
+        action_chain.perform()
+
+    def _space(self, element: WebElement) -> None:
+        action_chain = ActionChains(self._webdriver)
+        action_chain.move_to_element(element)
+        action_chain.send_keys(' ')
+        action_chain.perform()
+
+    @_alertguard
+    def execute_script(self, script: str):
+        return self._webdriver.execute_script(script)
+
+    @_alertguard
+    def loadstate(self, state: str) -> None:
+        action_chain = ActionChains(self._webdriver)
+        import_btn = self._webdriver.find_element(By.ID, 'import-link')
+        action_chain.click(import_btn)
+        action_chain.send_keys(state)
+        action_chain.perform()
+        load_btn = self._webdriver.find_element(By.CSS_SELECTOR, 'input[value="Load Game"]')
+        action_chain = ActionChains(self._webdriver)
+        action_chain.send_keys_to_element(load_btn, Keys.ENTER)
+        action_chain.perform()
+
+    @_alertguard
+    def restart(self) -> None:
+        action_chain = ActionChains(self._webdriver)
+        action_chain.send_keys(Keys.F2)
+        action_chain.perform()
+
+    def savescreenshot(self) -> None:
+        i = 1
+        while os.path.exists(os.path.join(self.SCREENSHOT_PATH, f'screenshot{i}.png')):
+            i += 1
+        fp = os.path.join(self.SCREENSHOT_PATH, f'screenshot{i}.png')
+        self._webdriver.save_screenshot(fp)
+
+    def close(self) -> None:
+        self._webdriver.close()
+
+    def alive(self) -> bool:
+        try:
+            return self._webdriver.execute_script("return document.getElementsByClassName('square').length") > 0
+        except UnexpectedAlertPresentException:
+            # a game won and not yet restarted
+            return True
+        except WebDriverException:
+            return False
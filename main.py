@@ -1,11 +1,36 @@
-from game.game import Game
-from selenium.common.exceptions import UnexpectedAlertPresentException
+from game.backend import GameWon
+from game.cache import FrontierCache
+from game.game_new import Game
+from game.instrument import Instrument, aggregate, readreports, writereport
+from game.patterns import PatternTable
+from game.pool import SessionPool
+from game.replay import MoveLog
+import json
 import cProfile
 from timeit import default_timer as timer
 
 
 GAME_STATE = None
 
+# highlight the squares being worked on, turn off when nobody is watching
+VISUALIZE = True
+
+# games played at the same time, each in its own browser session
+N_SESSIONS = 1
+# the page each session loads, e.g. a local copy of the game as 'file:///path/to/minesweeper.html#'
+SESSION_URL = 'http://minesweeperonline.com/#'
+
+# every move is appended here when set, lost games can then be replayed with python -m game.replay
+MOVE_LOG = None
+# MOVE_LOG = 'moves.jsonl'
+
+# look small frontiers up in the cache of layouts generated by python -m game.patterns
+USE_PATTERNS = True
+
+# per-game timings and counters are appended here as JSON lines when set
+REPORT_FILE = None
+# REPORT_FILE = 'report.jsonl'
+
 # medium-length guessing algoX game: ~96s
 # GAME_STATE = 'eyJ2ZXJzaW9uIjoxLCJnYW1lVHlwZUlkIjozLCJudW1Sb3dzIjoxNiwibnVtQ29scyI6MzAsIm51bU1pbmVzIjo5OSwiZ3JpZE9iaiI6W1swLDEsMSwyLDEsMSwwLDAsMCwwLDAsMCwxLDEsMSwwLDAsMCwwLDEsMSwyLDEsMSwwLDEsMSwxLDAsMCwwLDBdLFswLDEsLTEwLDIsLTEwLDEsMCwwLDEsMiwyLDEsMSwtMTAsMSwxLDIsMiwxLDEsLTksMywtOSwxLDAsMSwtOSwzLDIsMSwwLDBdLFswLDIsMiwzLDEsMSwwLDAsMSwtOSwtOCwyLDIsMSwyLDIsLTcsLTcsMywyLDIsLTgsMiwxLDAsMSwzLC03LC04LDEsMCwwXSxbMCwxLC05LDIsMSwxLDEsMiwyLDMsNCwtOCwyLDAsMSwtOSw0LC03LC04LDEsMSwxLDEsMCwwLDAsMiwtOCwzLDEsMCwwXSxbMCwyLDQsLTcsMiwxLC0xMCwyLC0xMCwxLDIsLTksMywxLDIsMiwzLDMsMiwxLDAsMSwxLDIsMSwyLDIsMiwxLDAsMCwwXSxbMSwzLC02LC03LDIsMSwyLDMsMiwxLDEsMSwzLC05LDIsMSwtMTAsMiwyLDIsMSwxLC0xMCwzLC05LDQsLTksMiwwLDEsMSwxXSxbMSwtOCwtNiw0LDIsMCwyLC05LDIsMCwwLDAsMiwtOCwzLFsyLDEsMCwwXSxbMSwxLDAsMF0sWzMsMSwwLDBdLC04LC04LDEsMSwxLDMsLTksNSwtOCw0LDEsMiwtMTAsMV0sWzEsMiw0LC04LDIsMSw0LC03LDQsMSwxLDAsMSwyLC05LFsxLDEsMCwwXSxbMCwxLDAsMF0sWzIsMSwwLDBdLC04LDMsMSwxLDEsMywyLDUsLTgsNCwtMTAsMiwxLDFdLFswLDAsMiwtOCwzLDIsLTgsLTcsNCwtOSwxLDAsMCxbMSwxLDAsMF0sWzEsMSwwLDBdLFsxLDEsMCwwXSxbMCwxLDAsMF0sWzIsMSwwLDBdLDIsMiwxLDIsLTksMiwtMTAsMywtOSwzLDEsMSwwLDBdLFswLDAsMSwyLC05LDIsMiwzLC04LDIsMSwxLDEsWzEsMSwwLDBdLFswLDEsMCwwXSxbMCwxLDAsMF0sWzAsMSwwLDBdLFsxLDEsMCwwXSwtOSwyLDMsLTgsMywzLDIsMywxLDEsMCwwLDAsMF0sWzEsMiwzLDMsMiwxLDEsMiwyLDIsMSwyLC05LFsyLDEsMCwwXSxbMSwxLDAsMF0sWzAsMSwwLDBdLFsxLDEsMCwwXSxbMiwxLDAsMF0sMywtOCw0LC04LDIsMiwtOCwzLDEsMCwwLDEsMSwxXSxbMSwtOCwtNywtOCwxLDAsMSwtMTAsMSwxLC0xMCwzLDMsLTgsWzEsMSwwLDBdLFswLDEsMCwwXSxbMSwxLDAsMF0sLTEwLDIsMywtNywzLDIsMywtNiwtNywyLDAsMCwxLC0xMCwxXSxbMSwzLC03LDMsMSwwLDEsMiwyLDIsMiwzLC03LDMsWzMsMSwwLDBdLFsxLDEsMCwwXSxbMywxLDAsMF0sMiwyLDIsLTksMiwxLC05LDQsLTgsMiwwLDAsMSwxLDFdLFswLDEsMSwxLDAsMSwxLDMsLTksMiwxLC05LDQsLTgsMywtMTAsMiwtMTAsMSwxLDEsMSwxLDEsMywyLDIsMSwxLDEsMCwwXSxbMCwwLDAsMCwwLDEsLTEwLDMsLTksMiwxLDEsMywtOCw1LDMsMywxLDIsMSwxLDAsMCwwLDIsLTksMiwxLC0xMCwxLDAsMF0sWzAsMCwxLDEsMSwxLDEsMiwxLDIsMSwyLDIsMywtOCwtOCwzLDIsMiwtMTAsMiwyLDIsMiwzLC04LDMsMiwyLDEsMCwwXSxbMCwwLDEsLTEwLDEsMCwwLDAsMCwxLC0xMCwyLC0xMCwyLDIsMywtOCwtOSwyLDEsMiwtOSwtOSwyLC05LDIsMiwtMTAsMSwwLDAsMF0sWzAsMCwxLDEsMSwwLDAsMCwwLDEsMSwyLDEsMSwwLDEsMiwyLDEsMCwxLDIsMiwyLDEsMSwxLDEsMSwwLDAsMF1dLCJ0aW1lIjoxfQ=='
 
@@ -38,25 +63,35 @@ def driver():
         sum_tt = 0
         wins = 0
         n_games = 0
-        game = Game(**DIFFICULTIES['expert'], state=GAME_STATE)
+        cache = FrontierCache()
+        instrument = Instrument() if REPORT_FILE else None
+        log = MoveLog(MOVE_LOG) if MOVE_LOG else None
+        patterns = PatternTable() if USE_PATTERNS else None
+        game = Game(**DIFFICULTIES['expert'], state=GAME_STATE, snapshot=True, cache=cache,
+                    instrument=instrument, visualize=VISUALIZE, log=log, patterns=patterns)
         while True:
             win = False
             tt = timer()
             game.start()
             try:
                 game.attemptsolve()
-            except UnexpectedAlertPresentException:
+            except GameWon:
                 print('Winner is you')
                 wins += 1
                 tt = timer() - tt
                 sum_tt += tt
                 win = True
+            game.endgame(win)
             if not win: game.savescreenshot()
             n_games += 1
+            if REPORT_FILE:
+                writereport(REPORT_FILE, game.report(game=n_games, won=win))
             print(
                 'N Games:', n_games,
                 'Winrate:', wins / n_games * 100,
-                'Average TT:', (sum_tt / wins) if wins > 0 else None
+                'Average TT:', (sum_tt / wins) if wins > 0 else None,
+                'Cache hits:', cache.hits, 'misses:', cache.misses,
+                'Searches avoided:', game.searches_avoided
             )
             game.restart()
     except KeyboardInterrupt:
@@ -65,8 +100,47 @@ def driver():
         if game:
             print('Closing game')
             game.close()
+        if REPORT_FILE:
+            print(json.dumps(aggregate(readreports(REPORT_FILE)), indent=1))
+
+
+def pooleddriver(difficulty: str='expert', n_games: int=100):
+    '''
+    Plays games on N_SESSIONS browser sessions at once.
+    '''
+    from game.webbackend import WebDriverBackend
+    config = DIFFICULTIES[difficulty]
+    pool = SessionPool(lambda: WebDriverBackend(config['difficulty'], SESSION_URL), N_SESSIONS, max_games=50)
+
+    def playgame(backend):
+        game = Game(**config, backend=backend, snapshot=True, visualize=VISUALIZE)
+        tt = timer()
+        try:
+            game.start()
+            game.attemptsolve()
+        except GameWon:
+            return True, timer() - tt
+        return False, timer() - tt
+
+    try:
+        tt = timer()
+        results = pool.play(playgame, n_games)
+        tt = timer() - tt
+        wins = sum(won for won, _ in results)
+        print(
+            'N Games:', n_games,
+            'Winrate:', wins / n_games * 100,
+            'Games per second:', n_games / tt,
+            'Sessions replaced:', pool.replaced
+        )
+    finally:
+        pool.close()
+
 
 if __name__ == '__main__':
     # cProfile.run('driver()', sort='tottime')
-    driver()
+    if N_SESSIONS > 1:
+        pooleddriver()
+    else:
+        driver()
     # game = Game(**DIFFICULTIES['expert'], state=GAME_STATE)
\ No newline at end of file
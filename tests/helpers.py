@@ -0,0 +1,92 @@
+import random
+from typing import Dict, List, Optional, Tuple, Type
+from game.backend import GameWon
+from game.csp import MineCounts
+from game.game_new import Game
+from game.simulator import SimulatedBackend
+from game.solver import FrontierProblem
+
+
+def bruteforce(problem: FrontierProblem) -> MineCounts:
+    '''
+    Counts the bomb arrangements of a problem by trying every assignment of its variables.
+    '''
+    counts = MineCounts({}, {})
+    for mines in range(1 << problem.n_vars):
+        if all((mask & mines).bit_count() == value for mask, value in problem.constraints):
+            n = mines.bit_count()
+            if n not in counts.counts:
+                counts.counts[n] = 0
+                counts.tallies[n] = [0] * problem.n_vars
+            counts.counts[n] += 1
+            for var in range(problem.n_vars):
+                counts.tallies[n][var] += mines >> var & 1
+    return counts
+
+
+def randomproblem(
+    rng: random.Random,
+    n_vars: int,
+    n_constraints: int,
+    satisfiable: bool=True,
+    max_size: int=4
+) -> FrontierProblem:
+    '''
+    Returns a problem of clues over up to max_size variables each, beyond which the matrices of the
+    exact cover engines grow with the orderings of a clue's bombs. A satisfiable problem takes its
+    values from a random arrangement, otherwise they are drawn at random and need not be
+    satisfiable.
+    '''
+    mines = rng.getrandbits(n_vars)
+    constraints = []
+    for _ in range(n_constraints):
+        mask = sum(1 << var for var in rng.sample(range(n_vars), rng.randint(1, min(max_size, n_vars))))
+        value = (mask & mines).bit_count() if satisfiable else rng.randint(0, mask.bit_count())
+        constraints.append((mask, value))
+    return FrontierProblem(n_vars, tuple(constraints))
+
+
+def chainproblem(rng: random.Random, n_vars: int) -> FrontierProblem:
+    '''
+    Returns a satisfiable problem of clues over runs of three consecutive variables, like a strip of
+    blanks along a row of clues, so that it has articulation variables to cut at.
+    '''
+    mines = rng.getrandbits(n_vars)
+    constraints = []
+    for start in range(0, n_vars - 2, 2):
+        mask = 0b111 << start
+        constraints.append((mask, (mask & mines).bit_count()))
+    return FrontierProblem(n_vars, tuple(constraints))
+
+
+def nonzero(counts: MineCounts) -> Tuple[Dict[int, int], Dict[int, List[int]]]:
+    return (
+        {n: count for n, count in counts.counts.items() if count},
+        {n: counts.tallies[n] for n, count in counts.counts.items() if count}
+    )
+
+
+def playgame(
+    width: int,
+    height: int,
+    bombs: int,
+    seed: int,
+    backend: Optional[SimulatedBackend]=None,
+    game_cls: Type[Game]=Game,
+    **kwargs
+) -> Tuple[Game, bool]:
+    '''
+    Plays a simulated game to the end and returns the game and whether it was won. The game is an
+    instance of game_cls, e.g. a Game checking its own steps.
+    '''
+    if backend is None:
+        backend = SimulatedBackend(width, height, bombs, seed=seed)
+    kwargs.setdefault('snapshot', True)
+    kwargs.setdefault('visualize', False)
+    game = game_cls('', width, height, bombs, backend=backend, **kwargs)
+    try:
+        game.start()
+        game.attemptsolve()
+    except GameWon:
+        return game, True
+    return game, False
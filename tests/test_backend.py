@@ -0,0 +1,70 @@
+import pytest
+from game.backend import GameWon, QueuedBackend
+from game.simulator import SimulatedBackend
+from helpers import playgame
+
+
+class CountingBackend(SimulatedBackend):
+    # counts the calls which would each be a round trip to the browser
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scripts = 0
+        self.batches = 0
+        self.moves = 0
+
+    def perform(self, moves) -> None:
+        self.batches += 1
+        self.moves += len(moves)
+        super().perform(moves)
+
+    def execute_script(self, script: str) -> None:
+        self.scripts += 1
+
+
+def test_visualize():
+    for seed in range(5):
+        backend = CountingBackend(16, 16, 40, seed=seed)
+        game, won = playgame(16, 16, 40, seed, backend=backend)
+        assert backend.scripts == 0
+
+        backend = CountingBackend(16, 16, 40, seed=seed)
+        visualized, visualized_won = playgame(16, 16, 40, seed, backend=backend, visualize=True)
+        assert (visualized_won, visualized.guesses) == (won, game.guesses)
+        assert backend.scripts
+
+
+def test_queued():
+    backend = SimulatedBackend(3, 3, 1)
+    backend.board.placemines([0])
+    queued = QueuedBackend(backend)
+    queued.click(4)
+    queued.flag(0)
+    assert not backend.board.opened[4]
+    # reads see every move made before them
+    assert queued.getclass(4) == 'square open1'
+    assert backend.board.flagged[0]
+    queued.chord(4)
+    with pytest.raises(GameWon):
+        queued.snapshot()
+    # a move which ends the game is not made again
+    queued.flush()
+
+
+def test_queued_restart():
+    backend = SimulatedBackend(3, 3, 1)
+    queued = QueuedBackend(backend)
+    queued.click(4)
+    queued.restart()
+    assert queued.snapshot() == ['square blank'] * 9
+
+
+def test_batches():
+    # the moves of a step go out together
+    moves = 0
+    batches = 0
+    for seed in range(5):
+        backend = CountingBackend(30, 16, 99, seed=seed)
+        playgame(30, 16, 99, seed, backend=backend)
+        moves += backend.moves
+        batches += backend.batches
+    assert moves > 2 * batches
@@ -0,0 +1,25 @@
+import json
+import batch
+
+
+def test_runbatch(tmp_path):
+    output = tmp_path / 'results.jsonl'
+    summary = batch.runbatch(list(range(8)), 'beginner', processes=2, output=str(output))
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert summary['games'] == len(results) == 8
+    assert summary['wins'] == sum(result['won'] for result in results)
+    assert summary['guesses']['total'] == sum(result['guesses'] for result in results)
+
+    # the games are the same whichever process plays them
+    batch._initworker(0)
+    played = [batch.playgame((seed, 'beginner', 'csp', None, None)) for seed in range(8)]
+    assert [(r['won'], r['guesses']) for r in played] == [
+        (r['won'], r['guesses']) for r in sorted(results, key=lambda r: r['seed'])
+    ]
+
+
+def test_engines_play_alike():
+    batch._initworker(0)
+    for seed in range(5):
+        results = [batch.playgame((seed, 'intermediate', engine, None, None)) for engine in ('csp', 'bits', 'dlx')]
+        assert len(set((r['won'], r['guesses']) for r in results)) == 1
@@ -0,0 +1,22 @@
+import json
+from benchmarks import suite
+
+
+def test_baseline_results():
+    # every benchmark still produces the results recorded in the baseline, whatever its speed
+    with open(suite.BASELINE) as f:
+        baseline = json.load(f)
+    for name, (calls, summarise) in suite.benchmarks(*suite.loadcorpus()).items():
+        assert suite.digest([call() for call in calls], summarise) == baseline[name]['digest'], name
+
+
+def test_compare():
+    baseline = {'a': {'digest': 'x', 'ops_per_s': 100.0}, 'b': {'digest': 'y', 'ops_per_s': 100.0}}
+    results = {
+        'a': {'digest': 'x', 'ops_per_s': 80.0},
+        'b': {'digest': 'z', 'ops_per_s': 60.0},
+        'c': {'digest': 'w', 'ops_per_s': 1.0},
+    }
+    assert suite.compare(results, baseline, 0.3) == [
+        'b: results differ from the baseline', 'b: 60.0 ops/s, baseline 100.0 ops/s'
+    ]
@@ -0,0 +1,63 @@
+import random
+from game.board import BLANK, FLAG, OPEN, BoardState, indices
+
+
+def randomboard(rng: random.Random, width: int, height: int) -> BoardState:
+    state = BoardState(width, height)
+    for index in range(width * height):
+        kind = rng.choice((BLANK, BLANK, FLAG, OPEN, OPEN, OPEN))
+        state.setkind(index, kind)
+        if kind == OPEN:
+            state.setclue(index, rng.randint(0, 8))
+    return state
+
+
+def test_neighbours():
+    rng = random.Random(0)
+    for width, height in ((1, 1), (1, 5), (5, 1), (9, 9), (30, 16)):
+        state = BoardState(width, height)
+        for index in range(width * height):
+            x, y = index % width, index // width
+            assert sorted(state.neighbours[index]) == sorted(
+                j for j in range(width * height)
+                if j != index and abs(j % width - x) <= 1 and abs(j // width - y) <= 1
+            )
+        for _ in range(10):
+            mask = rng.getrandbits(width * height)
+            assert list(indices(mask)) == [i for i in range(width * height) if mask >> i & 1]
+            assert state.dilate(mask) == sum(
+                1 << i for i in range(width * height) if state.neighbour_masks[i] & mask
+            )
+            planes = state.countneighbours(mask)
+            for i in range(width * height):
+                count = sum((plane >> i & 1) << k for k, plane in enumerate(planes))
+                assert count == (state.neighbour_masks[i] & mask).bit_count()
+
+
+def test_kinds():
+    rng = random.Random(1)
+    state = randomboard(rng, 16, 16)
+    for index, kind in enumerate(state.kinds):
+        assert (state.blank >> index & 1, state.flag >> index & 1, state.open >> index & 1) == (
+            kind == BLANK, kind == FLAG, kind == OPEN
+        )
+    assert state.unsatisfied() == sum(1 << i for i, clue in enumerate(state.clues) if clue > 0)
+    assert state.countflags(17) == sum(state.kinds[j] == FLAG for j in state.neighbours[17])
+
+
+def test_trivial():
+    rng = random.Random(2)
+    for _ in range(50):
+        state = randomboard(rng, 9, 9)
+        state.revealed = rng.getrandbits(81) & state.open
+        to_flag = 0
+        to_reveal = 0
+        for index, clue in enumerate(state.clues):
+            blanks = [j for j in state.neighbours[index] if state.kinds[j] == BLANK]
+            if clue < 0 or not blanks:
+                continue
+            if clue == len(blanks):
+                to_flag |= sum(1 << j for j in blanks)
+            elif clue == 0 and not state.revealed >> index & 1:
+                to_reveal |= 1 << index
+        assert state.trivial() == (to_flag, to_reveal)
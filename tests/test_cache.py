@@ -0,0 +1,73 @@
+import random
+from typing import NamedTuple
+from game.cache import TRANSFORMS, FrontierCache, signature
+from game.csp import MineCounts
+from helpers import playgame
+
+
+class Cell(NamedTuple):
+    x: int
+    y: int
+    clue: int
+
+
+def randomlayout(rng: random.Random):
+    cells = rng.sample([(x, y) for x in range(4) for y in range(4)], rng.randint(2, 8))
+    n_clues = rng.randint(1, len(cells) - 1)
+    clues = [Cell(x, y, rng.randint(1, 3)) for x, y in cells[:n_clues]]
+    blanks = [Cell(x, y, 0) for x, y in cells[n_clues:]]
+    return clues, blanks
+
+
+def constraints(clues, blanks):
+    # the clues as constraints over the blanks in the given order
+    return sorted(
+        (sum(1 << i for i, b in enumerate(blanks) if max(abs(b.x - sq.x), abs(b.y - sq.y)) == 1), sq.clue)
+        for sq in clues
+    )
+
+
+def test_signature_transforms():
+    rng = random.Random(0)
+    for _ in range(200):
+        clues, blanks = randomlayout(rng)
+        key, ordered = signature(clues, blanks)
+        dx, dy = rng.randint(-20, 20), rng.randint(-20, 20)
+        for transform in TRANSFORMS:
+            moved_clues = [Cell(*transform(sq.x + dx, sq.y + dy), sq.clue) for sq in clues]
+            moved_blanks = [Cell(*transform(sq.x + dx, sq.y + dy), 0) for sq in blanks]
+            rng.shuffle(moved_clues)
+            rng.shuffle(moved_blanks)
+            moved_key, moved_ordered = signature(moved_clues, moved_blanks)
+            assert moved_key == key
+            # tallies stored in the order of one frontier's blanks fit the other's
+            assert constraints(moved_clues, moved_ordered) == constraints(clues, ordered)
+
+
+def test_signature_values():
+    clues = [Cell(0, 0, 1)]
+    blanks = [Cell(1, 0, 0), Cell(1, 1, 0)]
+    assert signature(clues, blanks)[0] != signature([Cell(0, 0, 2)], blanks)[0]
+    assert signature(clues, blanks)[0] != signature(clues, blanks[:1])[0]
+
+
+def test_lru():
+    cache = FrontierCache(2)
+    for key in 'abc':
+        cache.put(key, MineCounts({0: 1}, {0: []}))
+    assert 'a' not in cache and len(cache) == 2
+    assert cache.get('b') is not None
+    cache.put('d', MineCounts({0: 1}, {0: []}))
+    assert 'b' in cache and 'c' not in cache
+    assert cache.get('c') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cached_games():
+    # a shared cache changes nothing about how games are played
+    cache = FrontierCache()
+    for seed in range(10):
+        game, won = playgame(16, 16, 40, seed)
+        cached_game, cached_won = playgame(16, 16, 40, seed, cache=cache)
+        assert (cached_won, cached_game.guesses) == (won, game.guesses)
+    assert cache.hits
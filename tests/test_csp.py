@@ -0,0 +1,53 @@
+import random
+from game import csp
+from helpers import randomproblem
+
+
+def solutions(problem):
+    return [
+        mines for mines in range(1 << problem.n_vars)
+        if all((mask & mines).bit_count() == value for mask, value in problem.constraints)
+    ]
+
+
+def test_iterassignments():
+    rng = random.Random(0)
+    for _ in range(200):
+        problem = randomproblem(rng, rng.randint(1, 10), rng.randint(1, 6), rng.random() < 0.5, max_size=8)
+        # variables outside every constraint are left without bombs
+        constrained = 0
+        for mask, _ in problem.constraints:
+            constrained |= mask
+        expected = [mines for mines in solutions(problem) if not mines & ~constrained]
+        assert sorted(csp.iterassignments(list(problem.constraints))) == expected
+
+
+def test_reduce_sound():
+    # whatever reduce assigns holds in every solution, and it only gives up on unsolvable problems
+    rng = random.Random(1)
+    reduced = 0
+    for _ in range(500):
+        problem = randomproblem(rng, rng.randint(1, 12), rng.randint(1, 8), rng.random() < 0.7, max_size=8)
+        expected = solutions(problem)
+        assignment = csp.reduce(list(problem.constraints))
+        if assignment is None:
+            assert not expected
+            continue
+        mines, safe = assignment
+        assert not mines & safe
+        for solution in expected:
+            assert solution & mines == mines
+            assert not solution & safe
+        reduced += bool(mines | safe)
+    assert reduced > 100
+
+
+def test_reduce_pairs():
+    # 1-2-1: the blanks beside the 2 are bombs and the others safe
+    assert csp.reduce([(0b00111, 1), (0b01110, 2), (0b11100, 1)]) == (0b01010, 0b10101)
+    # a 1 whose blanks are a subset of a 2's leaves a bomb on the rest of the 2's
+    assert csp.reduce([(0b011, 1), (0b111, 2)]) == (0b100, 0)
+    # a 2 sharing two of its blanks with a 1 has a bomb on its third, and the 1 has none outside
+    assert csp.reduce([(0b0111, 2), (0b1110, 1)]) == (0b0001, 0b1000)
+    # single constraints are not enough for a plain overlap
+    assert csp.propagate([(0b011, 1), (0b111, 2)], 0, 0) == (0, 0)
@@ -0,0 +1,68 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from game.cache import FrontierCache
+from game.game_new import Game
+from helpers import playgame
+
+
+def outcomes(n_games: int, **kwargs):
+    results = []
+    for seed in range(n_games):
+        game, won = playgame(16, 16, 40, seed, **kwargs)
+        results.append((won, game.guesses))
+    return results
+
+
+def test_executor():
+    # solving the frontiers ahead of time on an executor plays the same games
+    expected = outcomes(6)
+    with ThreadPoolExecutor(2) as executor:
+        assert outcomes(6, executor=executor) == expected
+    with ProcessPoolExecutor(2) as executor:
+        assert outcomes(6, executor=executor) == expected
+
+
+class SamplingGame(Game):
+    '''
+    Records the frontiers estimated rather than counted, and checks that none is sampled twice
+    before the next move.
+    '''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimated = 0
+        self._sampled = set()
+
+    def _solve(self, problem):
+        counts = super()._solve(problem)
+        if counts.stderr:
+            assert problem not in self._sampled
+            self._sampled.add(problem)
+            self.estimated += 1
+        return counts
+
+    def open(self, squares):
+        self._sampled.clear()
+        return super().open(squares)
+
+    def reveal(self, squares):
+        self._sampled.clear()
+        return super().reveal(squares)
+
+    def flag(self, square):
+        self._sampled.clear()
+        return super().flag(square)
+
+
+def test_node_limit():
+    # games go on with estimates, which are not kept in the cache
+    cache = FrontierCache()
+    estimated = 0
+    for seed in range(5):
+        game, _ = playgame(30, 16, 99, seed, game_cls=SamplingGame, cache=cache, node_limit=30)
+        estimated += game.estimated
+    assert estimated
+    assert all(not counts.stderr for counts in cache._entries.values())
+
+
+def test_snapshot():
+    # reading the board in one snapshot sees the same as reading it square by square
+    assert outcomes(4, snapshot=False) == outcomes(4)
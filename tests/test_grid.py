@@ -0,0 +1,33 @@
+from game.game_new import Game
+from game.square_new import Square
+from helpers import playgame
+
+
+class CheckedGame(Game):
+    '''
+    Checks the grid's incremental frontiers against a scan of the whole board every time they are
+    asked for.
+    '''
+    checks = 0
+
+    def getfrontiers(self):
+        frontiers = super().getfrontiers()
+        assert sorted(map(indices, frontiers)) == sorted(map(indices, self.grid.computefrontiers()))
+        for frontier in frontiers:
+            for clue in frontier:
+                assert clue.clue and any(adj.char == Square.BLANK for adj in clue.adj)
+        CheckedGame.checks += 1
+        return frontiers
+
+
+def indices(squares):
+    return sorted(sq.index for sq in squares)
+
+
+def test_frontiers():
+    CheckedGame.checks = 0
+    for seed in range(5):
+        playgame(30, 16, 99, seed, game_cls=CheckedGame)
+    for seed in range(10):
+        playgame(16, 16, 40, seed, game_cls=CheckedGame)
+    assert CheckedGame.checks > 100
@@ -0,0 +1,33 @@
+from game.instrument import Instrument, aggregate, readreports, writereport
+from helpers import playgame
+
+
+def test_phase():
+    instrument = Instrument()
+    with instrument.phase('a'):
+        with instrument.phase('a'):
+            with instrument.phase('b'):
+                pass
+    assert instrument.calls == {'a': 1, 'b': 1}
+    assert instrument.seconds['a'] >= instrument.seconds['b']
+
+
+def test_instrumented_games(tmp_path):
+    # an instrument only watches, the games are the same with or without one
+    path = str(tmp_path / 'report.jsonl')
+    for seed in range(4):
+        game, won = playgame(16, 16, 40, seed)
+        instrumented, instrumented_won = playgame(16, 16, 40, seed, instrument=Instrument())
+        assert (instrumented_won, instrumented.guesses) == (won, game.guesses)
+        report = instrumented.report(seed=seed)
+        assert report['guesses'] == game.guesses and report['seed'] == seed
+        assert report['phases']['trivial']['calls']
+        for frontier in report['frontiers']:
+            assert frontier['solutions'] and frontier['nodes']
+        writereport(path, report)
+
+    reports = readreports(path)
+    total = aggregate(reports)
+    assert total['games'] == 4
+    assert total['frontiers']['count'] == sum(len(report['frontiers']) for report in reports)
+    assert total['phases']['trivial']['calls'] == sum(report['phases']['trivial']['calls'] for report in reports)
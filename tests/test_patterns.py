@@ -0,0 +1,48 @@
+import pytest
+from game import patterns
+from game.game_new import Game
+from game.patterns import PatternTable
+from helpers import playgame
+
+
+class CheckedGame(Game):
+    # checks every frontier found in the table against counting it
+    hits = 0
+
+    def bruteforce(self, frontier):
+        probabilities = self.patterns.lookup(frontier)
+        if probabilities is not None:
+            exact = self._probabilities(*self.countmines(frontier))
+            assert probabilities.keys() == exact.keys()
+            for blank, p in exact.items():
+                # probabilities are stored in 255ths
+                assert probabilities[blank] == pytest.approx(p, abs=1 / 255)
+                assert (probabilities[blank] == 1) == (p == 1)
+            CheckedGame.hits += 1
+        return super().bruteforce(frontier)
+
+
+def test_lookups():
+    table = PatternTable()
+    CheckedGame.hits = 0
+    # seeds the table was not generated from
+    for seed in range(5000, 5010):
+        playgame(30, 16, 99, seed, game_cls=CheckedGame, patterns=table)
+    table.close()
+    assert CheckedGame.hits > 20
+
+
+def test_table(tmp_path):
+    # a table written from records finds every one of them and nothing else
+    clues = [(1, 0, 1), (2, 0, 2)]
+    blanks = [(0, 1), (1, 1), (2, 1), (3, 1)]
+    record = patterns.solvelayout(clues, blanks)
+    path = str(tmp_path / 'patterns.bin')
+    patterns.writetable({patterns.layoutkey(clues, blanks): record}, path)
+    table = PatternTable(path)
+    assert len(table) == 1
+    assert table._find(patterns.layoutkey(clues, blanks)) == patterns.RECORD.unpack(record)
+    assert table._find(patterns.layoutkey(clues[:1], blanks)) is None
+    table.close()
+    # a layout no arrangement satisfies has no record
+    assert patterns.solvelayout([(0, 0, 3)], [(1, 0)]) is None
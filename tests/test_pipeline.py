@@ -0,0 +1,59 @@
+import pytest
+from game.backend import GameWon
+from game.pipeline import IOPipeline, PipelinedBackend
+from game.simulator import SimulatedBackend
+from helpers import playgame
+
+
+def test_order():
+    pipeline = IOPipeline()
+    calls = []
+    for i in range(100):
+        pipeline.submit(calls.append, i)
+    assert pipeline.call(len, calls) == 100
+    assert calls == list(range(100))
+    pipeline.close()
+
+
+def test_errors():
+    pipeline = IOPipeline()
+    calls = []
+
+    def fail():
+        raise GameWon()
+
+    pipeline.submit(fail)
+    pipeline.submit(calls.append, 1)
+    # the error is raised again by the next read and the calls in between are skipped
+    with pytest.raises(GameWon):
+        pipeline.call(len, calls)
+    with pytest.raises(GameWon):
+        pipeline.drain()
+    assert calls == []
+    pipeline.reset()
+    assert pipeline.call(len, calls) == 0
+    pipeline.close()
+
+
+def test_backend():
+    board = SimulatedBackend(3, 3, 1)
+    board.board.placemines([0])
+    backend = PipelinedBackend(board)
+    backend.click(4)
+    backend.flag(0)
+    assert backend.getclass(4) == 'square open1'
+    backend.chord(4)
+    with pytest.raises(GameWon):
+        backend.snapshot()
+    backend.restart()
+    assert backend.snapshot() == ['square blank'] * 9
+    backend.close()
+
+
+def test_pipelined_games():
+    # moves made in the background and frontiers counted while waiting play the same games
+    for seed in range(6):
+        game, won = playgame(30, 16, 99, seed)
+        pipelined, pipelined_won = playgame(30, 16, 99, seed, pipeline=True)
+        assert (pipelined_won, pipelined.guesses) == (won, game.guesses)
+        pipelined.close()
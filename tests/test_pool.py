@@ -0,0 +1,87 @@
+import pytest
+from game import pool
+from game.pool import PoolExhausted, SessionPool
+from game.simulator import SimulatedBackend
+from helpers import playgame
+
+
+class FlakyBackend(SimulatedBackend):
+    def __init__(self) -> None:
+        super().__init__(9, 9, 10)
+        self.healthy = True
+        self.closed = False
+
+    def alive(self) -> bool:
+        return self.healthy
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_play():
+    sessions = SessionPool(lambda: SimulatedBackend(9, 9, 10), 3)
+
+    def game(backend):
+        return playgame(9, 9, 10, None, backend=backend)[1]
+
+    results = sessions.play(game, 12)
+    assert len(results) == 12 and any(results)
+    sessions.close()
+
+
+def test_max_games():
+    sessions = SessionPool(FlakyBackend, 1, max_games=2)
+    first = sessions.acquire()
+    sessions.release(first)
+    assert sessions.acquire() is first
+    sessions.release(first)
+    assert first.closed and sessions.replaced == 1
+    assert sessions.acquire() is not first
+
+
+def test_unhealthy():
+    sessions = SessionPool(FlakyBackend, 1)
+    backend = sessions.acquire()
+    sessions.release(backend)
+    backend.healthy = False
+    replacement = sessions.acquire()
+    assert replacement is not backend and backend.closed
+
+
+def test_exhausted():
+    backends = []
+
+    def factory():
+        if backends:
+            raise RuntimeError('no browser')
+        backends.append(FlakyBackend())
+        return backends[-1]
+
+    sessions = SessionPool(factory, 1)
+    backend = sessions.acquire()
+    backend.healthy = False
+    sessions.release(backend)
+    # the dead session cannot be replaced, which fails acquire instead of leaving it waiting
+    with pytest.raises(PoolExhausted):
+        sessions.acquire(timeout=5)
+    with pytest.raises(PoolExhausted):
+        sessions.acquire(timeout=5)
+    assert sessions.lost == 1
+
+
+def test_factory_retried():
+    # the factory fails every attempt but the last when replacing the session
+    calls = []
+
+    def factory():
+        calls.append(None)
+        if 1 < len(calls) <= pool.FACTORY_ATTEMPTS:
+            raise RuntimeError('busy')
+        return FlakyBackend()
+
+    sessions = SessionPool(factory, 1)
+    backend = sessions.acquire()
+    backend.healthy = False
+    sessions.release(backend)
+    assert sessions.acquire() is not backend and sessions.lost == 0
+    assert len(calls) == pool.FACTORY_ATTEMPTS + 1
@@ -0,0 +1,61 @@
+import random
+import pytest
+from game import solver
+from game.probability import convolve, globalprobabilities
+from game.solver import FrontierProblem
+from helpers import randomproblem
+
+
+def boardprobabilities(problems, n_interior: int, remaining_bombs: int):
+    '''
+    Returns the probability of a bomb on every variable and on an interior square by trying every
+    arrangement of the whole board with the remaining bombs on it.
+    '''
+    n_vars = sum(problem.n_vars for problem in problems) + n_interior
+    tallies = [0] * n_vars
+    total = 0
+    for mines in range(1 << n_vars):
+        if mines.bit_count() != remaining_bombs:
+            continue
+        offset = 0
+        valid = True
+        for problem in problems:
+            local = mines >> offset & ((1 << problem.n_vars) - 1)
+            if any((mask & local).bit_count() != value for mask, value in problem.constraints):
+                valid = False
+                break
+            offset += problem.n_vars
+        if valid:
+            total += 1
+            for var in range(n_vars):
+                tallies[var] += mines >> var & 1
+    return [tally / max(total, 1) for tally in tallies], total
+
+
+def test_convolve():
+    assert convolve([1, 2], [1, 1]) == [1, 3, 2]
+    assert convolve([1], [0, 0, 3]) == [0, 0, 3]
+
+
+def test_globalprobabilities():
+    rng = random.Random(0)
+    for _ in range(100):
+        problems = [randomproblem(rng, rng.randint(1, 4), rng.randint(1, 2)) for _ in range(rng.randint(1, 3))]
+        n_interior = rng.randint(1, 4)
+        n_vars = sum(problem.n_vars for problem in problems)
+        remaining_bombs = rng.randint(0, n_vars + n_interior)
+        expected, total = boardprobabilities(problems, n_interior, remaining_bombs)
+        if not total:
+            continue
+
+        probabilities, interior = globalprobabilities(
+            [solver.countmines(problem) for problem in problems], n_interior, remaining_bombs
+        )
+        assert [p for frontier in probabilities for p in frontier] == pytest.approx(expected[:n_vars])
+        assert interior == pytest.approx(expected[n_vars])
+
+
+def test_unsolvable():
+    problems = [FrontierProblem(1, ((1, 1),)), FrontierProblem(2, ((0b11, 3),))]
+    probabilities, interior = globalprobabilities([solver.countmines(problem) for problem in problems], 2, 3)
+    assert probabilities == [[], []] and interior == 0.0
@@ -0,0 +1,58 @@
+from game.replay import MoveLog, readgames, replay
+from helpers import playgame
+
+
+def playlogged(path: str, seeds, **kwargs):
+    log = MoveLog(path)
+    results = []
+    for seed in seeds:
+        game, won = playgame(30, 16, 99, seed, log=log, **kwargs)
+        game.endgame(won)
+        results.append(won)
+    log.close()
+    return results
+
+
+def test_replay(tmp_path):
+    path = str(tmp_path / 'moves.jsonl')
+    results = playlogged(path, range(6))
+    games = readgames(path)
+    assert len(games) == 6
+    for won, recorded in zip(results, games):
+        assert recorded['end']['end'] == won and len(recorded['end']['mines']) == 99
+        replayed = replay(recorded)
+        assert replayed['divergence'] is None
+        assert replayed['won'] == won and replayed['moves'] == len(recorded['moves'])
+        # the engines agree on every move
+        assert replay(recorded, engine='bits')['divergence'] is None
+
+
+def test_divergence(tmp_path):
+    path = str(tmp_path / 'moves.jsonl')
+    playlogged(path, [1])
+    recorded = readgames(path)[0]
+    moves = [i for i, move in enumerate(recorded['moves']) if move['move'] == 'open']
+    changed = moves[len(moves) // 2]
+    recorded['moves'][changed]['squares'] = [-1]
+    assert replay(recorded)['divergence'] == changed
+
+
+def test_memory_log():
+    log = MoveLog()
+    log.startgame(9, 9, 10)
+    log.move('flag', [3, 1], p=0.5)
+    log.endgame(False, [2, 1])
+    assert [list(record) for record in log.records] == [
+        ['start', 'width', 'height', 'bombs', 'state'], ['move', 'squares', 't', 'p'], ['end', 'mines', 't']
+    ]
+    assert log.records[1]['squares'] == [1, 3] and log.records[2]['mines'] == [1, 2]
+
+
+def test_unfinished(tmp_path):
+    # a game cut short has no end
+    path = tmp_path / 'moves.jsonl'
+    log = MoveLog(str(path))
+    log.startgame(9, 9, 10)
+    log.move('open', [40])
+    log.close()
+    assert readgames(str(path))[0]['end'] is None
@@ -0,0 +1,74 @@
+import random
+from game import serialize
+from game.game_new import Game
+from game.grid_new import Grid
+from game.simulator import Board, PositionView
+from helpers import playgame
+
+
+def test_state_roundtrip():
+    obj = serialize.createstate(3, 2, [0, 5], [False, True, False, False, False, False], [True] + [False] * 5)
+    assert serialize.decodestate(serialize.encodestate(obj)) == obj
+    assert serialize.cells(obj) == [
+        (-10, False, True), (2, True, False), (1, False, False), (1, False, False), (2, False, False), (-10, False, False)
+    ]
+
+
+def test_board_roundtrip():
+    for seed in range(10):
+        board = Board(16, 16, 40, seed)
+        rng = random.Random(seed)
+        board.open(rng.randrange(256))
+        for index in rng.sample(range(256), 10):
+            board.toggleflag(index)
+        state = board.exportstate()
+
+        loaded = Board(16, 16, 0)
+        loaded.loadstate(state)
+        assert loaded.mines == board.mines and loaded.bombs == 40
+        assert (loaded.opened, loaded.flagged, loaded.counts) == (board.opened, board.flagged, board.counts)
+        assert loaded.exportstate() == state
+        assert [loaded.classname(i) for i in range(256)] == [board.classname(i) for i in range(256)]
+
+
+def test_position_roundtrip():
+    rng = random.Random(0)
+    for _ in range(50):
+        width, height = rng.randint(1, 30), rng.randint(1, 16)
+        kinds = [rng.randrange(4) for _ in range(width * height)]
+        clues = [rng.randint(0, 8) if kind == serialize.OPEN else -1 for kind in kinds]
+        data = serialize.encodeposition(width, height, kinds, clues)
+        assert serialize.decodeposition(data) == (width, height, kinds, clues)
+        _, _, classnames = serialize.positionclasses(data)
+        assert serialize.classposition(width, height, classnames) == data
+    assert len(serialize.encodeposition(30, 16, [serialize.OPEN] * 480, [8] * 480)) <= 362
+
+
+class CapturingGame(Game):
+    # keeps the board, the position and the frontiers the solver saw at every guess
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.captured = []
+
+    def guess(self, blanks):
+        self.captured.append((self._backend.exportstate(), self.grid.position(), frontiers(self.grid)))
+        return super().guess(blanks)
+
+
+def frontiers(grid):
+    return sorted(sorted((sq.index, sq.clue) for sq in frontier) for frontier in grid.getfrontiers())
+
+
+def test_grid_position():
+    # a grid built from a position is the one the position was taken from, flags and all
+    n_positions = 0
+    for seed in range(5):
+        game, _ = playgame(30, 16, 99, seed, game_cls=CapturingGame)
+        for state, position, grid_frontiers in game.captured:
+            assert serialize.stateposition(state) == position
+            grid = Grid(PositionView(position), 30, 16, snapshot=True)
+            assert grid.position() == position
+            assert frontiers(grid) == grid_frontiers
+            assert frontiers(Grid(PositionView.fromstate(state), 30, 16, snapshot=True)) == grid_frontiers
+            n_positions += 1
+    assert n_positions > 10
@@ -0,0 +1,77 @@
+import pytest
+from game.backend import GameWon
+from game.simulator import Board, SimulatedBackend
+from helpers import playgame
+
+
+def test_firstclick_safe():
+    for seed in range(50):
+        board = Board(9, 9, 80, seed)
+        board.open(40)
+        assert 40 not in board.mines
+        assert len(board.mines) == 80
+        assert not board.exploded
+
+
+def test_counts():
+    board = Board(3, 3, 0)
+    board.placemines([0, 8])
+    assert board.counts == [0, 1, 0, 1, 2, 1, 0, 1, 0]
+
+
+def test_floodfill():
+    board = Board(5, 5, 1, seed=0)
+    board.placemines([24])
+    board.open(0)
+    assert board.won
+    assert board.n_opened == 24
+    assert board.classname(24) == 'square blank'
+
+
+def test_explode():
+    board = Board(3, 3, 1)
+    board.placemines([4])
+    board.open(4)
+    assert board.exploded == 4 and board.over
+    assert board.classname(4) == 'square bombdeath'
+    board.open(0)
+    assert not board.opened[0]
+
+
+def test_chord():
+    board = Board(3, 3, 1)
+    board.placemines([0])
+    board.open(4)
+    board.chord(4)
+    assert not board.opened[1]
+    board.toggleflag(0)
+    board.chord(4)
+    assert board.won
+    assert board.classname(0) == 'square bombflagged'
+
+
+def test_misflag():
+    board = Board(3, 3, 1)
+    board.placemines([0])
+    board.open(4)
+    board.toggleflag(1)
+    board.open(0)
+    assert board.classname(1) == 'square bombmisflagged'
+    assert board.classname(0) == 'square bombdeath'
+
+
+def test_backend_won():
+    backend = SimulatedBackend(3, 3, 1)
+    backend.board.placemines([0])
+    backend.click(4)
+    backend.flag(0)
+    with pytest.raises(GameWon):
+        backend.chord(4)
+
+
+def test_seeded_games():
+    # the same seed plays the same game
+    results = [playgame(9, 9, 10, seed) for seed in range(5)]
+    again = [playgame(9, 9, 10, seed) for seed in range(5)]
+    assert [won for _, won in results] == [won for _, won in again]
+    assert [game.guesses for game, _ in results] == [game.guesses for game, _ in again]
@@ -0,0 +1,182 @@
+import random
+from math import prod
+from time import perf_counter
+import pytest
+from game import bitcover, csp, exactcover, sampling, solver
+from game.solver import FrontierProblem
+from helpers import bruteforce, chainproblem, nonzero, randomproblem
+
+
+ENGINES = ('csp', 'bits', 'dlx')
+
+
+def problems(seed: int, n: int, satisfiable: bool=True, max_size: int=4):
+    rng = random.Random(seed)
+    return [randomproblem(rng, rng.randint(1, 10), rng.randint(1, 6), satisfiable, max_size) for _ in range(n)]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines(engine):
+    for problem in problems(0, 150):
+        assert nonzero(solver.countmines(problem, engine)) == nonzero(bruteforce(problem)), problem
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines_unsatisfiable(engine):
+    for problem in problems(1, 150, satisfiable=False):
+        assert nonzero(solver.countmines(problem, engine)) == nonzero(bruteforce(problem)), problem
+
+
+def test_csp_large_clues():
+    # clues around all 8 neighbours, too many orderings for the matrices
+    for problem in problems(3, 150, max_size=8):
+        assert nonzero(solver.countmines(problem, 'csp')) == nonzero(bruteforce(problem)), problem
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines_empty(engine):
+    assert nonzero(solver.countmines(FrontierProblem(0, ()), engine)) == ({0: 1}, {0: []})
+    problem = FrontierProblem(2, ((0b11, 3),))
+    assert nonzero(solver.countmines(problem, engine)) == ({}, {})
+
+
+def test_enumeration():
+    # listing the solutions finds as many as counting them
+    for problem in problems(2, 50):
+        mat, _, n_rows, n_cols, n_secondary = solver.creatematrix(problem)
+        counts = bitcover.countcover(bitcover.createnodematrix(mat, n_rows, n_cols, n_secondary))
+        n_solutions = sum(counts.counts.values())
+
+        solutions = []
+        bitcover.exactcover(bitcover.createnodematrix(mat, n_rows, n_cols, n_secondary), all_solutions=solutions)
+        assert len(solutions) == n_solutions
+
+        solutions = []
+        exactcover.exactcover(exactcover.createnodematrix(mat, n_rows, n_cols, n_secondary), all_solutions=solutions)
+        assert len(solutions) == n_solutions
+
+
+def test_components():
+    for problem in problems(4, 100):
+        everything = (1 << problem.n_vars) - 1
+        comps = solver.components(problem.constraints, everything)
+        linked = 0
+        for comp in comps:
+            assert not comp & linked
+            linked |= comp
+        assert linked == everything
+        for mask, _ in problem.constraints:
+            assert sum(1 for comp in comps if comp & mask) == 1
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_cuts(engine, monkeypatch):
+    # cut even the small problems at their articulation variables
+    monkeypatch.setattr(solver, 'CUT_SIZE', 2)
+    rng = random.Random(5)
+    cases = [chainproblem(rng, rng.randint(3, 13)) for _ in range(50)] + problems(6, 100)
+    for problem in cases:
+        assert nonzero(solver.countmines(problem, engine)) == nonzero(bruteforce(problem)), problem
+
+
+def test_articulation():
+    rng = random.Random(7)
+    for _ in range(50):
+        problem = chainproblem(rng, rng.randint(5, 13))
+        var = solver.articulation(problem)
+        everything = (1 << problem.n_vars) - 1
+        assert var is not None
+        assert len(solver.components(problem.constraints, everything & ~(1 << var))) > 1
+    assert solver.articulation(FrontierProblem(3, ((0b111, 1),))) is None
+
+
+def denseproblem(seed: int, n_vars: int, n_extra: int) -> FrontierProblem:
+    '''
+    Returns a satisfiable problem with every variable in a clue, clues over runs of four variables
+    along with some over random ones, so that it takes more than a few nodes to count.
+    '''
+    rng = random.Random(seed)
+    mines = rng.getrandbits(n_vars)
+    masks = [0b1111 << start & ((1 << n_vars) - 1) for start in range(0, n_vars - 1, 3)]
+    masks += [sum(1 << var for var in rng.sample(range(n_vars), 4)) for _ in range(n_extra)]
+    return FrontierProblem(n_vars, tuple((mask, (mask & mines).bit_count()) for mask in masks))
+
+
+def test_budget_restores_matrix():
+    # running out of budget part way leaves the matrices as they were for the next count
+    problem = denseproblem(0, 14, 2)
+    mat, _, n_rows, n_cols, n_secondary = solver.creatematrix(problem)
+
+    node_matrix = exactcover.createnodematrix(mat, n_rows, n_cols, n_secondary)
+    expected = exactcover.countcover(node_matrix, n_rows)
+    with pytest.raises(csp.BudgetExceeded):
+        exactcover.countcover(node_matrix, n_rows, csp.Budget(nodes=20))
+    assert exactcover.countcover(node_matrix, n_rows) == expected
+    with pytest.raises(csp.BudgetExceeded):
+        exactcover.exactcover(node_matrix, budget=csp.Budget(nodes=20))
+    solutions = []
+    exactcover.exactcover(node_matrix, all_solutions=solutions)
+    assert len(solutions) == sum(expected.counts.values())
+
+    bit_matrix = bitcover.createnodematrix(mat, n_rows, n_cols, n_secondary)
+    with pytest.raises(csp.BudgetExceeded):
+        bitcover.countcover(bit_matrix, csp.Budget(nodes=20))
+    assert bitcover.countcover(bit_matrix) == expected
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_budget_then_count(engine):
+    # an estimate when the budget runs out, then exact counts again without one
+    problem = denseproblem(1, 16, 0)
+    estimate = solver.countmines(problem, engine, node_limit=10)
+    assert estimate.stderr > 0 and estimate.counts
+    counts = solver.countmines(problem, engine)
+    assert counts.stderr == 0 and nonzero(counts) == nonzero(bruteforce(problem))
+
+
+def test_sampling_estimate():
+    problem = denseproblem(2, 16, 2)
+    exact = bruteforce(problem)
+    estimate = sampling.samplecounts(problem.n_vars, list(problem.constraints), n_samples=4096)
+    total = sum(exact.counts.values())
+    total_estimate = sum(estimate.counts.values())
+    # every sample estimates the number of assignments, the counts add them up
+    assert total_estimate / 4096 == pytest.approx(total, rel=0.1)
+    for var in range(problem.n_vars):
+        p = sum(tallies[var] for tallies in exact.tallies.values()) / total
+        p_estimate = sum(tallies[var] for tallies in estimate.tallies.values()) / total_estimate
+        assert p_estimate == pytest.approx(p, abs=max(5 * estimate.stderr, 0.05))
+
+
+def test_sampling_time_limit():
+    problem = randomproblem(random.Random(3), 80, 25, max_size=8)
+    tt = perf_counter()
+    estimate = solver.countmines(problem, 'csp', time_limit=0.02)
+    tt = perf_counter() - tt
+    assert estimate.counts and estimate.stderr > 0
+    # the search and then the sampling get the limit each, with room for a slow machine
+    assert tt < 0.5
+
+
+def test_creatematrix():
+    for problem in problems(8, 100):
+        mat, row_vars, n_rows, n_cols, n_secondary = solver.creatematrix(problem)
+        assert n_rows == len(mat) == len(row_vars)
+        assert n_cols == sum(value for _, value in problem.constraints) and n_secondary == problem.n_vars
+        for row, var in zip(mat, row_vars):
+            # a column of every constraint on the variable and the variable's own secondary column
+            constraints = [c for c, (mask, _) in enumerate(problem.constraints) if mask >> var & 1]
+            assert len(row) == len(constraints) + 1 and row[-1] == n_cols + var
+            owners = [c for c, (_, value) in enumerate(problem.constraints) for _ in range(value)]
+            assert [owners[col] for col in row[:-1]] == constraints
+        for var in range(problem.n_vars):
+            expected = prod(value for mask, value in problem.constraints if mask >> var & 1)
+            assert row_vars.count(var) == expected
+
+
+def test_createbitmatrix():
+    # the same matrix as building the rows with creatematrix first
+    cases = problems(9, 100) + [FrontierProblem(3, ((0b011, 0), (0b110, 2)))]
+    for problem in cases:
+        mat, row_vars, n_rows, n_cols, n_secondary = solver.creatematrix(problem)
+        assert solver.createbitmatrix(problem) == (bitcover.createnodematrix(mat, n_rows, n_cols, n_secondary), row_vars)